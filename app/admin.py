@@ -1,9 +1,17 @@
 from django.contrib import admin
-from .models import Build, Component, CustomUser, StatusLog, Checklist, InvoiceStatus
+from .models import Build, Component, CustomUser, StatusLog, Checklist, InvoiceStatus, BenchmarkResult, BenchmarkStats, Task, BuildSchedule, Payment, IdempotencyKey, StageSnapshot, SnapshotBuild
 
 admin.site.register(Build)
 admin.site.register(Component)
 admin.site.register(StatusLog)
 admin.site.register(Checklist)
 admin.site.register(InvoiceStatus)
+admin.site.register(BenchmarkResult)
+admin.site.register(BenchmarkStats)
+admin.site.register(Task)
+admin.site.register(BuildSchedule)
+admin.site.register(Payment)
+admin.site.register(IdempotencyKey)
+admin.site.register(StageSnapshot)
+admin.site.register(SnapshotBuild)
 admin.site.register(CustomUser)  # Register User model for admin access
\ No newline at end of file
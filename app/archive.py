@@ -0,0 +1,121 @@
+import os
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.utils import timezone
+
+from .models import BenchmarkResult, Build, Checklist, Component, InvoiceStatus, Payment, StatusLog
+from .throttling import bump_data_version
+
+ARCHIVE_DB = 'archive'
+
+# Parent first, so rows can be inserted in this order on the archive database
+ARCHIVED_MODELS = [Build, Component, StatusLog, Checklist, BenchmarkResult, InvoiceStatus, Payment]
+RELATION_TO_BUILD = {
+    Build: 'id',
+    Component: 'build_id',
+    StatusLog: 'build_id',
+    Checklist: 'build_id',
+    BenchmarkResult: 'checklist__build_id',
+    InvoiceStatus: 'build_id',
+    Payment: 'build_id',
+}
+
+
+_archive_migrated = False
+
+
+def archive_available():
+    # Never create an empty archive file just by reading from it, and only read
+    # once its schema has every migration the hot tables have
+    global _archive_migrated
+    if _archive_migrated:
+        return True
+    name = str(connections[ARCHIVE_DB].settings_dict['NAME'])
+    if not (name.startswith(('file:', ':memory:')) or os.path.exists(name)):
+        return False
+    executor = MigrationExecutor(connections[ARCHIVE_DB])
+    _archive_migrated = not executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return _archive_migrated
+
+
+def prepare_archive():
+    global _archive_migrated
+    call_command('migrate', database=ARCHIVE_DB, verbosity=0, interactive=False)
+    _archive_migrated = False
+
+
+def archivable_builds(older_than_days):
+    cutoff = timezone.localdate() - timedelta(days=older_than_days)
+    # Served by the (currentStage, deadline) index
+    return Build.objects.filter(currentStage='Shipped', deadline__lt=cutoff).order_by('deadline', 'id')
+
+
+class ArchiveConflict(Exception):
+    pass
+
+
+def row_values(instance):
+    # auto_now fields are restamped by the copy itself, so they don't tell two builds apart
+    return tuple(
+        getattr(instance, field.attname) for field in instance._meta.concrete_fields
+        if not getattr(field, 'auto_now', False)
+    )
+
+
+def archive_batch(build_ids):
+    """
+    Copy the builds and every dependent row to the archive database, then
+    delete from the hot tables only the builds whose rows are all confirmed in
+    the archive. Returns the ids archived. A build copied by an interrupted
+    run is simply copied again; but build ids are assigned by clients and can
+    be reused, so an archived build with the same id and different data raises
+    ArchiveConflict before anything is copied.
+    """
+    hot = {build.id: build for build in Build.objects.filter(id__in=build_ids)}
+    clashes = sorted(
+        build.id for build in Build.objects.using(ARCHIVE_DB).filter(id__in=hot)
+        if row_values(build) != row_values(hot[build.id])
+    )
+    if clashes:
+        raise ArchiveConflict(f"The archive already holds different builds with ids: {', '.join(map(str, clashes))}")
+
+    with transaction.atomic(using=ARCHIVE_DB):
+        for model in ARCHIVED_MODELS:
+            rows = list(model.objects.filter(**{f'{RELATION_TO_BUILD[model]}__in': hot}))
+            model.objects.using(ARCHIVE_DB).bulk_create(rows, ignore_conflicts=True)
+
+    # A row the archive doesn't hold under the same build (skipped as a conflict, or
+    # written since the copy) keeps its build in the hot tables for the next run
+    confirmed = set(hot)
+    for model in ARCHIVED_MODELS:
+        relation = RELATION_TO_BUILD[model]
+        filters = {f'{relation}__in': hot}
+        missing = set(model.objects.filter(**filters).values_list(relation, 'pk')) \
+            - set(model.objects.using(ARCHIVE_DB).filter(**filters).values_list(relation, 'pk'))
+        confirmed -= {build_id for build_id, _ in missing}
+
+    with transaction.atomic():
+        # Cascades to components, logs, checklists, benchmarks, invoices and payments
+        Build.objects.filter(id__in=confirmed).delete()
+    bump_data_version()
+    return confirmed
+
+
+def archive_shipped_builds(older_than_days, batch_size=200, on_batch=None):
+    prepare_archive()
+    total = 0
+    unconfirmed = set()
+    while True:
+        build_ids = list(
+            archivable_builds(older_than_days).exclude(id__in=unconfirmed).values_list('id', flat=True)[:batch_size]
+        )
+        if not build_ids:
+            return total
+        archived = archive_batch(build_ids)
+        unconfirmed.update(set(build_ids) - archived)
+        total += len(archived)
+        if on_batch:
+            on_batch(total)
@@ -0,0 +1,135 @@
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+BUILDER_OPEN_STAGES = {'Components Pending', 'Components Assigned', 'Build Started'}
+TESTER_OPEN_STAGES = BUILDER_OPEN_STAGES | {'Build Completed', 'Testing Started'}
+ROLES = {
+    'builder': ('builder', 'builderAssignedDate', BUILDER_OPEN_STAGES, 'Build Completed'),
+    'tester': ('tester', 'testerAssignedDate', TESTER_OPEN_STAGES, 'Test Completed'),
+}
+
+
+class EngineerStats:
+    __slots__ = ('queue', 'completed', 'total_hours')
+
+    def __init__(self):
+        self.queue = 0
+        self.completed = 0
+        self.total_hours = 0.0
+
+    @property
+    def avg_hours(self):
+        return self.total_hours / self.completed if self.completed else None
+
+
+class AssignmentIndex:
+    """
+    Per-engineer open queue counts and historical turnaround for builders and
+    testers. Rebuilt from a few queries on first use (and after
+    ASSIGNMENT_INDEX_TTL seconds, to pick up writes from other processes),
+    updated incrementally from Build.save, with the ranking cached per role.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.open_builds = {}
+        self.stats = {}
+        self.rankings = {}
+
+    def ensure_built(self):
+        if self.built_at is None or time.monotonic() - self.built_at > settings.ASSIGNMENT_INDEX_TTL:
+            self.rebuild()
+
+    def rebuild(self):
+        from .models import Build, StatusLog
+
+        open_builds = {
+            build_id: (builder, tester, stage)
+            for build_id, builder, tester, stage in Build.objects.exclude(currentStage='Shipped')
+            .values_list('id', 'builder', 'tester', 'currentStage')
+        }
+        stats = {role: {} for role in ROLES}
+        for role, (name_field, date_field, open_stages, done_stage) in ROLES.items():
+            role_stats = stats[role]
+            for name in Build.objects.exclude(**{f'{name_field}__isnull': True}).exclude(**{name_field: ''}) \
+                    .values_list(name_field, flat=True).distinct():
+                role_stats[name] = EngineerStats()
+            for builder, tester, stage in open_builds.values():
+                name = builder if role == 'builder' else tester
+                if name and stage in open_stages:
+                    role_stats[name].queue += 1
+            completions = (
+                StatusLog.objects
+                .filter(status=done_stage, action='advance', **{f'build__{date_field}__isnull': False})
+                .exclude(**{f'build__{name_field}__isnull': True})
+                .values_list(f'build__{name_field}', f'build__{date_field}', 'timestamp')
+            )
+            for name, assigned_at, completed_at in completions:
+                self._record_completion(role_stats.setdefault(name, EngineerStats()), assigned_at, completed_at)
+
+        with self.lock:
+            self.open_builds = open_builds
+            self.stats = stats
+            self.rankings = {}
+            self.built_at = time.monotonic()
+
+    def observe(self, build):
+        # Called after every Build.save; a no-op until the index has been built
+        with self.lock:
+            if self.built_at is None:
+                return
+            old = self.open_builds.pop(build.id, (None, None, None))
+            new = (build.builder, build.tester, build.currentStage)
+            if build.currentStage != 'Shipped':
+                self.open_builds[build.id] = new
+            for index, (role, (name_field, date_field, open_stages, done_stage)) in enumerate(ROLES.items()):
+                role_stats = self.stats[role]
+                old_name, old_stage = old[index], old[2]
+                new_name, new_stage = new[index], new[2]
+                if old_name and old_stage in open_stages and old_name in role_stats:
+                    role_stats[old_name].queue -= 1
+                if new_name:
+                    entry = role_stats.setdefault(new_name, EngineerStats())
+                    if new_stage in open_stages:
+                        entry.queue += 1
+                    if new_stage == done_stage and old_stage != done_stage:
+                        self._record_completion(entry, getattr(build, date_field), timezone.now())
+            self.rankings = {}
+
+    def ranking(self, role):
+        self.ensure_built()
+        with self.lock:
+            if role not in self.rankings:
+                self.rankings[role] = self._rank(self.stats[role])
+            return self.rankings[role]
+
+    @staticmethod
+    def _record_completion(entry, assigned_at, completed_at):
+        if assigned_at and completed_at and completed_at >= assigned_at:
+            entry.completed += 1
+            entry.total_hours += (completed_at - assigned_at).total_seconds() / 3600
+
+    @staticmethod
+    def _rank(role_stats):
+        known = [entry.avg_hours for entry in role_stats.values() if entry.avg_hours is not None]
+        default_hours = sum(known) / len(known) if known else 1.0
+        engineers = []
+        for name, entry in role_stats.items():
+            avg_hours = entry.avg_hours if entry.avg_hours is not None else default_hours
+            engineers.append({
+                'name': name,
+                'queue': entry.queue,
+                'completed': entry.completed,
+                'avgHours': round(avg_hours, 2),
+                # Expected hours until a newly assigned build would be done
+                'expectedHours': round((entry.queue + 1) * avg_hours, 2),
+            })
+        engineers.sort(key=lambda engineer: (engineer['expectedHours'], engineer['queue'], engineer['name']))
+        return engineers
+
+
+assignment_index = AssignmentIndex()
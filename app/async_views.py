@@ -0,0 +1,198 @@
+import asyncio
+import math
+
+from asgiref.sync import sync_to_async
+from django.db.models import Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from . import views
+from .models import Build, Checklist, StatusLog
+from .renderers import MessagePackRenderer, msgpack
+from .serializers import BuildSerializer, ChecklistSerializer, StatusLogSerializer
+from .throttling import BuildsThrottle, ChecklistsThrottle, StatusLogsThrottle, poll_hints
+
+# Async (ASGI) versions of the read-heavy endpoints. GETs run on the event loop with
+# the async ORM; other methods (and ?include_archived reads) fall through to the
+# synchronous DRF views.
+
+STAGE_ORDER = [stage for stage, _ in Build.STATUS_CHOICES]
+COMPLETION_STAGES = {'Build Completed': 'buildCompletedDate', 'Test Completed': 'testCompletedDate'}
+
+
+def json_response(data, status=200, request=None):
+    if request is not None and msgpack is not None and MessagePackRenderer.media_type in request.headers.get('Accept', ''):
+        return HttpResponse(MessagePackRenderer().render(data), status=status, content_type=MessagePackRenderer.media_type)
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+async def authenticate(request):
+    # Mirrors the DEFAULT_AUTHENTICATION_CLASSES + IsAuthenticated defaults. The token is checked
+    # on the event loop; only the user lookup goes through the (single-threaded) async ORM.
+    jwt = JWTAuthentication()
+    try:
+        header = jwt.get_header(request)
+        raw_token = jwt.get_raw_token(header) if header is not None else None
+        result = None
+        if raw_token is not None:
+            validated_token = jwt.get_validated_token(raw_token)
+            result = await sync_to_async(jwt.get_user)(validated_token), validated_token
+    except (AuthenticationFailed, InvalidToken) as e:
+        return json_response(e.detail, status=e.status_code)
+    if result is None:
+        return json_response({"detail": "Authentication credentials were not provided."}, status=401)
+    request.user = result[0]
+    return None
+
+
+async def throttle(request, throttle_class):
+    # Same per-scope limits as the @throttle_classes on the sync views
+    limiter = throttle_class()
+    # Cache only, no database: run it off the thread the async ORM queues on
+    if await sync_to_async(limiter.allow_request, thread_sensitive=False)(request, None):
+        return None
+    wait = limiter.wait()
+    response = json_response({"detail": "Request was throttled."}, status=429)
+    if wait is not None:
+        response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def stage_index(stage):
+    try:
+        return STAGE_ORDER.index(stage)
+    except ValueError:
+        return -1
+
+
+async def completion_dates(builds):
+    # Latest advance log per (build, completion stage) in one grouped query instead of two per build
+    rows = (
+        StatusLog.objects
+        .filter(build_id__in=[build.id for build in builds], status__in=COMPLETION_STAGES, action='advance')
+        .values('build_id', 'status')
+        .annotate(latest=Max('timestamp'))
+    )
+    return {(row['build_id'], row['status']): row['latest'] async for row in rows}
+
+
+@poll_hints('builds')
+@csrf_exempt
+async def build_list_create(request):
+    if request.method != 'GET' or views.include_archived(request):
+        return await sync_to_async(views.build_list_create)(request)
+    error = await throttle(request, BuildsThrottle)
+    if error:
+        return error
+
+    builds = [build async for build in Build.objects.prefetch_related('components').order_by('id')]
+    dates = await completion_dates(builds)
+    serialized_builds = []
+    for build in builds:
+        build_data = BuildSerializer(build).data
+        current_stage_idx = stage_index(build.currentStage)
+        for stage, key in COMPLETION_STAGES.items():
+            reached = current_stage_idx >= stage_index(stage)
+            build_data[key] = dates.get((build.id, stage)) if reached else None
+        serialized_builds.append(build_data)
+    return json_response(serialized_builds, request=request)
+
+
+@poll_hints('builds')
+@csrf_exempt
+async def build_detail(request, pk):
+    if request.method != 'GET' or views.include_archived(request):
+        return await sync_to_async(views.build_detail)(request, pk)
+    error = await authenticate(request)
+    if error:
+        return error
+    error = await throttle(request, BuildsThrottle)
+    if error:
+        return error
+    try:
+        build = await Build.objects.prefetch_related('components').aget(pk=pk)
+    except Build.DoesNotExist:
+        return HttpResponse(status=404)
+    response = json_response(BuildSerializer(build).data, request=request)
+    response['ETag'] = views.build_etag(build)
+    return response
+
+
+@poll_hints('status_logs')
+@csrf_exempt
+async def get_status_log(request, build_id):
+    if request.method != 'GET' or views.include_archived(request):
+        return await sync_to_async(views.get_status_log)(request, build_id)
+    error = await authenticate(request)
+    if error:
+        return error
+    error = await throttle(request, StatusLogsThrottle)
+    if error:
+        return error
+    fields, error = views.parse_fields_param(request, StatusLog)
+    if error:
+        return json_response(error.data, status=error.status_code)
+    logs = StatusLog.objects.filter(build_id=build_id)
+    if fields:
+        logs = logs.only(*fields)
+    logs = [log async for log in logs]
+    return json_response(StatusLogSerializer(logs, many=True, fields=fields).data, request=request)
+
+
+@poll_hints('checklists')
+@csrf_exempt
+async def get_checklist(request, build_id):
+    if request.method != 'GET' or views.include_archived(request):
+        return await sync_to_async(views.get_checklist)(request, build_id)
+    error = await authenticate(request)
+    if error:
+        return error
+    error = await throttle(request, ChecklistsThrottle)
+    if error:
+        return error
+    try:
+        checklist = await Checklist.objects.aget(build__id=build_id)
+    except Checklist.DoesNotExist:
+        return json_response({"detail": "No Checklist matches the given query."}, status=404)
+    return json_response(ChecklistSerializer(checklist).data, request=request)
+
+
+class AsyncSSEClient:
+    # Registered in views.sse_subscriptions so broadcast_sse_update (called from sync
+    # worker threads) can hand messages to this connection's event loop
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def write(self, msg):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, msg)
+
+    def flush(self):
+        pass
+
+
+@csrf_exempt
+async def sse_build_updates(request):
+    async def stream():
+        client = AsyncSSEClient()
+        views.sse_subscriptions.add(client, subscription)
+        try:
+            yield b": keep-alive\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(client.queue.get(), timeout=10)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            views.sse_subscriptions.remove(client)
+
+    subscription, error = await sync_to_async(views.sse_subscription)(request)
+    if error:
+        return error
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,112 @@
+import hashlib
+import re
+
+# A '-' is a sign only at the start or after whitespace: "35-72-88" is three readings, not 35, -72, -88
+NUMBER_RE = re.compile(r'(?:(?<!\S)-)?\d+(?:\.\d+)?')
+# A lone reading may group thousands ("15,234 pts"); in a triplet a comma always separates values
+GROUPED_NUMBER_RE = re.compile(r'(?:(?<!\S)-)?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?')
+
+CPU_KEYWORDS = ('RYZEN', 'INTEL', 'CORE I', 'CORE ULTRA', 'ATHLON', 'XEON', 'THREADRIPPER', 'PENTIUM', 'CELERON')
+GPU_KEYWORDS = ('RTX', 'GTX', 'GEFORCE', 'RADEON', 'RX ', 'ARC ', 'QUADRO')
+
+CPU_METRICS = [
+    'cinebenchSingle', 'cinebenchMulti',
+    'cpuTempIdle', 'cpuTempLoad', 'cpuTempStress',
+    'premiereRenderSeconds',
+]
+GPU_METRICS = [
+    'game1AvgFps', 'game2AvgFps',
+    'gpuTempIdle', 'gpuTempLoad', 'gpuTempStress',
+    'premiereRenderSeconds',
+]
+METRIC_FIELDS = list(dict.fromkeys(CPU_METRICS + GPU_METRICS))
+
+
+def parse_number(text):
+    if not text:
+        return None
+    match = GROUPED_NUMBER_RE.search(text)
+    return float(match.group().replace(',', '')) if match else None
+
+
+def parse_triplet(text):
+    # "35/72/88", "35-72-88", "35, 72, 88", "Idle 35 Load 72 Stress 88"
+    if not text:
+        return None, None, None
+    values = [float(v) for v in NUMBER_RE.findall(text)][:3]
+    return tuple(values + [None] * (3 - len(values)))
+
+
+def parse_duration(text):
+    # "2:35", "1:02:35", "2m 35s", "155s" or a bare number of seconds
+    if not text:
+        return None
+    text = text.strip().lower()
+    if ':' in text:
+        try:
+            parts = [float(p) for p in text.split(':')]
+        except ValueError:
+            return None
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + part
+        return seconds
+    units = re.findall(r'(\d+(?:\.\d+)?)\s*(h|m|s)', text)
+    if units:
+        scale = {'h': 3600, 'm': 60, 's': 1}
+        return sum(float(value) * scale[unit] for value, unit in units)
+    return parse_number(text)
+
+
+def parse_checklist_metrics(checklist):
+    cpu_idle, cpu_load, cpu_stress = parse_triplet(checklist.cpuTemperatureIdleLoadStress)
+    gpu_idle, gpu_load, gpu_stress = parse_triplet(checklist.gpuTemperatureIdleLoadStress)
+    return {
+        'cinebenchSingle': parse_number(checklist.cinebenchR23SingleCoreStock),
+        'cinebenchMulti': parse_number(checklist.cinebenchR23MulticoreStock),
+        'cpuTempIdle': cpu_idle,
+        'cpuTempLoad': cpu_load,
+        'cpuTempStress': cpu_stress,
+        'gpuTempIdle': gpu_idle,
+        'gpuTempLoad': gpu_load,
+        'gpuTempStress': gpu_stress,
+        'game1AvgFps': parse_number(checklist.game1AvgFps),
+        'game2AvgFps': parse_number(checklist.game2AvgFps),
+        'premiereRenderSeconds': parse_duration(checklist.premiereRenderTime),
+    }
+
+
+def component_kind(name):
+    name = f"{name.upper()} "
+    if any(keyword in name for keyword in GPU_KEYWORDS):
+        return 'gpu'
+    if any(keyword in name for keyword in CPU_KEYWORDS):
+        return 'cpu'
+    return None
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def distribution(values, quantiles=(0.1, 0.25, 0.5, 0.75, 0.9)):
+    values = sorted(values)
+    summary = {
+        'count': len(values),
+        'min': values[0] if values else None,
+        'max': values[-1] if values else None,
+    }
+    for q in quantiles:
+        summary[f'p{int(q * 100)}'] = percentile(values, q)
+    return summary
+
+
+def component_signature(names):
+    # Builds with the same set of part names share benchmark statistics
+    key = '\n'.join(sorted(name.strip().upper() for name in names if name))
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
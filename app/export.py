@@ -0,0 +1,168 @@
+import importlib.util
+import json
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+
+from .models import Build, Checklist, Component, StatusLog
+
+# Table -> (model, change marker). Rows are re-exported whenever the marker
+# moves; deleted rows are never exported, so consumers that need to notice
+# deletes must reconcile against a periodic full export.
+EXPORT_TABLES = {
+    'builds': (Build, 'updated_at'),
+    'components': (Component, 'updated_at'),
+    'status_logs': (StatusLog, 'timestamp'),
+    'checklists': (Checklist, 'updated_at'),
+}
+EXPORT_FORMATS = {
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrows', 'application/vnd.apache.arrow.stream'),
+}
+DEFAULT_CHUNK_SIZE = 5000
+# Exports stop this far behind the clock so a write still committing when the
+# export starts falls inside the next window rather than behind the watermark
+SETTLE_TIME = timedelta(seconds=30)
+
+
+def pyarrow_available():
+    # pyarrow is optional and slow to import, so only look for it here and
+    # import it in the functions that write files
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def arrow_type(field):
+    import pyarrow
+
+    if isinstance(field, models.DecimalField):
+        return pyarrow.decimal128(field.max_digits, field.decimal_places)
+    if isinstance(field, models.DateTimeField):
+        return pyarrow.timestamp('us', tz='UTC')
+    if isinstance(field, models.DateField):
+        return pyarrow.date32()
+    if isinstance(field, models.BooleanField):
+        return pyarrow.bool_()
+    if isinstance(field, models.FloatField):
+        return pyarrow.float64()
+    if isinstance(field, (models.IntegerField, models.AutoField, models.ForeignKey)):
+        return pyarrow.int64()
+    return pyarrow.string()
+
+
+def table_schema(model):
+    import pyarrow
+
+    fields = model._meta.concrete_fields
+    return fields, pyarrow.schema([pyarrow.field(field.attname, arrow_type(field), nullable=field.null) for field in fields])
+
+
+def current_watermark():
+    return timezone.now() - SETTLE_TIME
+
+
+class ChunkSink:
+    # Write-only file object that hands written bytes back to a generator
+    closed = False
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+class TableExport:
+    """
+    One table's rows changed in the window since < marker <= upto (either
+    bound optional) as Arrow record batches of chunk_size rows with typed
+    columns: decimals stay decimals, dates and timestamps keep their types.
+    A row changed again after being exported is exported again, so consumers
+    upsert by id. After iterating, count holds the rows exported; upto is the
+    watermark for the next incremental export.
+    """
+
+    def __init__(self, table, since=None, upto=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.model, self.marker = EXPORT_TABLES[table]
+        self.fields, self.schema = table_schema(self.model)
+        self.since = since
+        self.upto = upto
+        self.chunk_size = chunk_size
+        self.count = 0
+
+    def batches(self):
+        rows = self.model._base_manager.order_by(self.marker, 'pk').values_list(*[field.attname for field in self.fields])
+        if self.since is not None:
+            rows = rows.filter(**{f'{self.marker}__gt': self.since})
+        if self.upto is not None:
+            rows = rows.filter(**{f'{self.marker}__lte': self.upto})
+        chunk = []
+        for row in rows.iterator(chunk_size=self.chunk_size):
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield self._batch(chunk)
+                chunk = []
+        if chunk:
+            yield self._batch(chunk)
+
+    def _batch(self, chunk):
+        import pyarrow
+
+        columns = list(zip(*chunk))
+        for index, field in enumerate(self.fields):
+            if isinstance(field, models.JSONField):
+                columns[index] = [None if value is None else json.dumps(value) for value in columns[index]]
+        self.count += len(chunk)
+        return pyarrow.record_batch(
+            [pyarrow.array(column, type=field.type) for column, field in zip(columns, self.schema)],
+            schema=self.schema,
+        )
+
+
+def open_writer(sink, fmt, schema):
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    if fmt == 'parquet':
+        return pyarrow.parquet.ParquetWriter(sink, schema)
+    return pyarrow.ipc.new_stream(sink, schema)
+
+
+def export_to_file(export, path, fmt='parquet'):
+    import pyarrow
+
+    with open(path, 'wb') as stream:
+        writer = open_writer(pyarrow.PythonFile(stream, mode='w'), fmt, export.schema)
+        for batch in export.batches():
+            writer.write_batch(batch)
+        writer.close()
+
+
+def stream_export(export, fmt='parquet'):
+    # Generator for StreamingHttpResponse: yields the file's bytes batch by batch
+    import pyarrow
+
+    sink = ChunkSink()
+    writer = open_writer(pyarrow.PythonFile(sink, mode='w'), fmt, export.schema)
+    for batch in export.batches():
+        writer.write_batch(batch)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
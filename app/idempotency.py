@@ -0,0 +1,99 @@
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+
+
+def request_fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode('utf-8')).hexdigest()
+
+
+def idempotent(scope):
+    """
+    Honour an Idempotency-Key header on POSTs to a DRF view (apply below
+    @api_view). The first request under a key stores its response; a retry
+    with the same key and body gets that response back from one primary-key
+    lookup instead of running the view again. Keys are per user and scope and
+    expire after IDEMPOTENCY_KEY_TTL seconds. A key whose request is still
+    unfinished after IDEMPOTENCY_CLAIM_TIMEOUT seconds (its worker died or
+    hung) is taken over by the next retry.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            client_key = request.headers.get('Idempotency-Key')
+            if request.method != 'POST' or not client_key:
+                return view(request, *args, **kwargs)
+            if len(client_key) > MAX_KEY_LENGTH:
+                return Response({"error": f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters"},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            user_id = request.user.pk if request.user.is_authenticated else None
+            key = hashlib.sha256(f"{user_id}:{scope}:{client_key}".encode('utf-8')).hexdigest()
+            fingerprint = request_fingerprint(request)
+            now = timezone.now()
+
+            record = IdempotencyKey.objects.filter(key=key, expires_at__gt=now).first()
+            if record is None:
+                IdempotencyKey.objects.filter(key=key, expires_at__lte=now).delete()
+                try:
+                    # Claim the key before running the view, so a concurrent retry can't run it too
+                    record = IdempotencyKey.objects.create(
+                        key=key, fingerprint=fingerprint, claimed_at=now,
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    )
+                except IntegrityError:
+                    record = IdempotencyKey.objects.filter(key=key).first()
+                else:
+                    return run_and_store(record, view, request, *args, **kwargs)
+
+            if record is not None and record.status_code is None and record.fingerprint == fingerprint \
+                    and record.claimed_at <= now - timedelta(seconds=settings.IDEMPOTENCY_CLAIM_TIMEOUT):
+                # Conditional on the old claim, so only one retry takes it over
+                taken = IdempotencyKey.objects.filter(
+                    key=key, status_code__isnull=True, claimed_at=record.claimed_at,
+                ).update(claimed_at=now)
+                if taken:
+                    record.claimed_at = now
+                    return run_and_store(record, view, request, *args, **kwargs)
+                record = None
+            if record is None or record.status_code is None:
+                return Response({"error": "A request with this Idempotency-Key is still in progress"},
+                                status=status.HTTP_409_CONFLICT)
+            if record.fingerprint != fingerprint:
+                return Response({"error": "Idempotency-Key was already used for a different request"},
+                                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            response = Response(record.response, status=record.status_code)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        return wrapped
+    return decorator
+
+
+def run_and_store(record, view, request, *args, **kwargs):
+    # Writes go through the claim, so a request whose key was taken over can't release or overwrite it
+    claim = IdempotencyKey.objects.filter(key=record.key, claimed_at=record.claimed_at)
+    try:
+        response = view(request, *args, **kwargs)
+    except Exception:
+        claim.delete()
+        raise
+    if response.status_code >= 500:
+        # Server errors are worth retrying, so release the key
+        claim.delete()
+        return response
+    claim.update(status_code=response.status_code, response=response.data)
+    IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return response
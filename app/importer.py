@@ -0,0 +1,104 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import Build, BuildSchedule, Component, Payment, normalize_serial
+from .serializers import BuildImportSerializer
+from .throttling import bump_data_version
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+def read_rows(stream, fmt):
+    # Yields (row_number, dict); CSV rows carry components as a JSON list in a "components" column
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), 1):
+            row = {key: value for key, value in row.items() if value not in ('', None)}
+            if 'components' in row:
+                try:
+                    row['components'] = json.loads(row['components'])
+                except ValueError:
+                    pass  # left as a string so the serializer reports it against this row
+            yield number, row
+    elif fmt == 'ndjson':
+        for number, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, e
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def import_builds(rows, chunk_size=DEFAULT_CHUNK_SIZE, start_after=0, on_chunk=None):
+    """
+    Validate and insert builds with their components in chunks, one transaction per chunk.
+    Rows up to and including start_after are skipped so an interrupted import can resume.
+    """
+    report = {'imported': 0, 'components': 0, 'failed': 0, 'errors': [], 'lastRow': start_after}
+    rows = ((number, row) for number, row in rows if number > start_after)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        imported, components, errors = _import_chunk(chunk)
+        report['imported'] += imported
+        report['components'] += components
+        report['failed'] += len(errors)
+        room = MAX_REPORTED_ERRORS - len(report['errors'])
+        report['errors'].extend(errors[:max(room, 0)])
+        report['lastRow'] = chunk[-1][0]
+        if on_chunk:
+            on_chunk(report)
+    return report
+
+
+def _import_chunk(chunk):
+    errors = []
+    valid = []
+    # One serializer instance for the whole chunk, so its fields are built once rather than per row
+    validator = BuildImportSerializer()
+    for number, row in chunk:
+        if isinstance(row, Exception):
+            errors.append({'row': number, 'errors': {'non_field_errors': [str(row)]}})
+            continue
+        try:
+            valid.append((number, validator.run_validation(row)))
+        except ValidationError as e:
+            errors.append({'row': number, 'errors': e.detail})
+
+    # One query for primary-key clashes instead of a UniqueValidator lookup per row
+    existing = set(Build.objects.filter(id__in=[data['id'] for _, data in valid]).values_list('id', flat=True))
+    builds = []
+    components = []
+    seen = set()
+    for number, data in valid:
+        data = dict(data)
+        if data['id'] in existing or data['id'] in seen:
+            errors.append({'row': number, 'errors': {'id': [f"Build {data['id']} already exists."]}})
+            continue
+        seen.add(data['id'])
+        for comp_data in data.pop('components', []):
+            components.append(Component(
+                build_id=data['id'],
+                normalizedSerialNumber=normalize_serial(comp_data.get('serialNumber')),
+                **comp_data,
+            ))
+        builds.append(Build(**data))
+
+    with transaction.atomic():
+        Build.objects.bulk_create(builds)
+        Component.objects.bulk_create(components)
+        Payment.objects.bulk_create([entry for entry in map(Payment.opening_entry, builds) if entry])
+        BuildSchedule.refresh([build.id for build in builds])
+    bump_data_version()
+    errors.sort(key=lambda error: error['row'])
+    return len(builds), len(components), errors
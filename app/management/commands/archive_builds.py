@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.archive import ArchiveConflict, archive_shipped_builds
+
+
+class Command(BaseCommand):
+    help = "Move shipped builds (with components, logs, checklists, invoices and payments) to the archive database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=settings.ARCHIVE_AFTER_DAYS)
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            total = archive_shipped_builds(
+                options['older_than_days'],
+                options['batch_size'],
+                on_batch=lambda count: self.stdout.write(f"Archived {count} builds"),
+            )
+        except ArchiveConflict as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f"Done, {total} builds archived"))
@@ -0,0 +1,121 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.models import Build, CustomUser
+
+# Each mode runs in its own interpreter because the URLconf picks sync or async
+# views at import time (ASYNC_VIEWS)
+PROBE = """
+import asyncio, io, json, os, statistics, sys, time
+from concurrent.futures import ThreadPoolExecutor
+mode, path, token, requests, concurrency, threads = sys.argv[1], sys.argv[2], sys.argv[3], *map(int, sys.argv[4:7])
+headers = [(b'authorization', f'Bearer {token}'.encode())]
+latencies = []
+statuses = []
+
+if mode == 'wsgi':
+    from backend.wsgi import application
+    from wsgiref.util import setup_testing_defaults
+
+    def call(_):
+        environ = {'PATH_INFO': path, 'REQUEST_METHOD': 'GET', 'wsgi.input': io.BytesIO(),
+                   'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        setup_testing_defaults(environ)
+        started = time.perf_counter()
+        b''.join(application(environ, lambda status, headers: statuses.append(int(status.split()[0]))))
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+else:
+    from backend.asgi import application
+
+    async def call(semaphore):
+        async with semaphore:
+            scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                     'path': path, 'raw_path': path.encode(), 'query_string': b'', 'headers': headers,
+                     'server': ('testserver', 80), 'client': ('127.0.0.1', 0), 'scheme': 'http', 'root_path': ''}
+            sent = False
+
+            async def receive():
+                nonlocal sent
+                if not sent:
+                    sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await asyncio.sleep(3600)
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            latencies.append(time.perf_counter() - started)
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(call(semaphore) for _ in range(requests)))
+
+    started = time.perf_counter()
+    asyncio.run(main())
+    elapsed = time.perf_counter() - started
+
+latencies.sort()
+print(json.dumps({'rps': requests / elapsed, 'p50': latencies[len(latencies) // 2],
+                  'p95': latencies[int(len(latencies) * 0.95) - 1],
+                  'failed': sorted({status for status in statuses if status != 200}),
+                  'failures': sum(status != 200 for status in statuses)}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent GET throughput of the WSGI (sync DRF) and ASGI (async views) paths in one process each"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', help="Defaults to /api/get-status-log/<first build id>")
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=100, help="Concurrent pollers")
+        parser.add_argument('--wsgi-threads', type=int, default=8, help="Worker threads for the WSGI path")
+
+    def handle(self, *args, **options):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        user = CustomUser.objects.filter(is_active=True).first()
+        if user is None:
+            raise CommandError("Needs at least one active user to sign a token for.")
+        path = options['path']
+        if not path:
+            build_id = Build.objects.values_list('id', flat=True).first()
+            if build_id is None:
+                raise CommandError("No builds found; pass --path explicitly.")
+            path = f"/api/get-status-log/{build_id}"
+        token = str(AccessToken.for_user(user))
+
+        for mode in ('wsgi', 'asgi'):
+            result = self.probe(mode, path, token, options)
+            if result['failures']:
+                # Throughput of error responses would be meaningless
+                raise CommandError(
+                    f"{mode}: {result['failures']} of {options['requests']} responses were not 200 "
+                    f"(status {', '.join(map(str, result['failed']))})"
+                )
+            self.stdout.write(
+                f"{mode}: {result['rps']:8.1f} req/s  p50 {result['p50'] * 1000:7.1f} ms  p95 {result['p95'] * 1000:7.1f} ms"
+            )
+
+    def probe(self, mode, path, token, options):
+        # Every request comes from one user, so the per-user polling limits would answer most with 429
+        env = dict(os.environ, ASYNC_VIEWS='1' if mode == 'asgi' else '0', DISABLE_THROTTLES='1')
+        args = [mode, path, token, options['requests'], options['concurrency'], options['wsgi_threads']]
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE, *map(str, args)],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
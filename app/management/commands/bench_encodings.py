@@ -0,0 +1,80 @@
+import gzip
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from app.middleware import brotli
+from app.models import Build, Component, StatusLog
+from app.renderers import MessagePackRenderer, msgpack
+from app.serializers import BuildSerializer, StatusLogSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare payload size and encode time of JSON, gzip, brotli and MessagePack on a synthetic board (rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--builds', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['builds'])
+            builds = BuildSerializer(Build.objects.prefetch_related('components').order_by('id'), many=True).data
+            logs = StatusLogSerializer(StatusLog.objects.all(), many=True).data
+            transaction.set_rollback(True)
+
+        for label, data in (('builds', builds), ('status logs', logs)):
+            self.stdout.write(f"{label} ({len(data)} rows)")
+            json_body = JSONRenderer().render(data)
+            encoders = [('json', lambda: JSONRenderer().render(data))]
+            encoders.append(('json+gzip', lambda: gzip.compress(
+                JSONRenderer().render(data), compresslevel=settings.COMPRESSION_GZIP_LEVEL)))
+            if brotli is not None:
+                encoders.append(('json+br', lambda: brotli.compress(
+                    JSONRenderer().render(data), quality=settings.COMPRESSION_BROTLI_QUALITY)))
+            if msgpack is not None:
+                encoders.append(('msgpack', lambda: MessagePackRenderer().render(data)))
+                encoders.append(('msgpack+gzip', lambda: gzip.compress(
+                    MessagePackRenderer().render(data), compresslevel=settings.COMPRESSION_GZIP_LEVEL)))
+            for name, encode in encoders:
+                elapsed, body = self.measure(encode, options['repeat'])
+                self.stdout.write(
+                    f"  {name:<13} {len(body) / 1024:9.1f} KiB  {len(body) / len(json_body):6.1%}  {elapsed * 1000:8.1f} ms"
+                )
+            if brotli is None or msgpack is None:
+                self.stdout.write("  (install brotli / msgpack to include the missing encodings)")
+
+    def measure(self, encode, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = encode()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
+
+    def seed(self, builds):
+        start = (Build.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        # bulk_create skips Build.save and Component.save, so no schedules or indexes are touched
+        Build.objects.bulk_create([
+            Build(
+                id=start + i, customerName=f"Customer {i}", mobileNumber='9000000000', buildType='Normal',
+                deliveryType='Shipment', location='Chennai', deadline=date.today(), orderDate=date.today(),
+                enquiryId=f"ENQ-{i}", paymentDone=25000, totalAmount=85000, balancePayment=60000, adminName='bench',
+                builder='Builder', tester='Tester', currentStage='Build Started',
+            )
+            for i in range(builds)
+        ])
+        parts = ['AMD RYZEN 5 7600', 'MSI B650M', 'CORSAIR 32GB DDR5', 'ZOTAC RTX 4060', 'WD SN770 1TB', 'DEEPCOOL PL650D']
+        Component.objects.bulk_create([
+            Component(build_id=start + i, name=name, price=10000, serialNumber=f"SN{i}-{n}")
+            for i in range(builds) for n, name in enumerate(parts)
+        ])
+        StatusLog.objects.bulk_create([
+            StatusLog(build_id=start + i, status=stage, updated_by='bench', action='advance', remarks='ok')
+            for i in range(builds) for stage in ('Components Assigned', 'Build Started')
+        ])
@@ -0,0 +1,78 @@
+import time
+import tracemalloc
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from app.models import Build, Checklist, CustomUser, StatusLog
+from app.views import checklist_list_create, status_log_list_create
+
+
+class Command(BaseCommand):
+    help = "Compare latency and peak memory of full vs ?fields= projected list responses (synthetic data, rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--builds', type=int, default=2000)
+        parser.add_argument('--logs-per-build', type=int, default=5)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = self.seed(options['builds'], options['logs_per_build'])
+            factory = APIRequestFactory()
+            cases = [
+                ('status-logs full', status_log_list_create, '/api/status-logs/'),
+                ('status-logs projected', status_log_list_create, '/api/status-logs/?fields=id,build,status,timestamp'),
+                ('checklists full', checklist_list_create, '/api/checklists/'),
+                ('checklists projected', checklist_list_create, '/api/checklists/?fields=id,build,completed_at'),
+            ]
+            for label, view, url in cases:
+                elapsed, peak = self.measure(factory, user, view, url, options['repeat'])
+                self.stdout.write(f"{label:<24} {elapsed * 1000:9.1f} ms  {peak / 1024:9.0f} KiB peak")
+            transaction.set_rollback(True)
+
+    def seed(self, builds, logs_per_build):
+        start = (Build.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+        remarks = 'Lorem ipsum dolor sit amet. ' * 40
+        Build.objects.bulk_create([
+            Build(
+                id=start + i, customerName=f"Bench {i}", mobileNumber='9000000000', buildType='Normal',
+                deliveryType='Shipment', location='Bench', deadline=date.today(), orderDate=date.today(),
+                enquiryId=f"BENCH-{i}", paymentDone=0, totalAmount=0, balancePayment=0, adminName='bench',
+            )
+            for i in range(builds)
+        ])
+        ids = range(start, start + builds)
+        StatusLog.objects.bulk_create([
+            StatusLog(build_id=build_id, status='Build Started', updated_by='bench', remarks=remarks, rollback_reason=remarks)
+            for build_id in ids for _ in range(logs_per_build)
+        ])
+        text_fields = [f.name for f in Checklist._meta.concrete_fields if f.get_internal_type() == 'TextField']
+        # bulk_create skips Checklist.save, so no benchmark stats are touched
+        Checklist.objects.bulk_create([
+            Checklist(build_id=build_id, dateOfBenchmark=date.today(), **{name: remarks for name in text_fields})
+            for build_id in ids
+        ])
+        return CustomUser(email='bench@example.com', role='Supervisor')
+
+    def measure(self, factory, user, view, url, repeat):
+        def run():
+            request = factory.get(url)
+            force_authenticate(request, user=user)
+            view(request).render()
+
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+        # Memory is traced in a separate pass so tracemalloc overhead stays out of the timings
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return best, peak
@@ -0,0 +1,49 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Runs in a fresh interpreter so every sample is a true cold start
+PROBE = """
+import io, json, sys, time
+started = time.perf_counter()
+from backend.wsgi import application
+imported = time.perf_counter()
+from wsgiref.util import setup_testing_defaults
+environ = {'PATH_INFO': sys.argv[1], 'REQUEST_METHOD': 'GET', 'wsgi.input': io.BytesIO()}
+setup_testing_defaults(environ)
+statuses = []
+body = b''.join(application(environ, lambda status, headers: statuses.append(status)))
+finished = time.perf_counter()
+print(json.dumps({'import': imported - started, 'first_request': finished - imported, 'status': statuses[0]}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure cold-start import time and first-request latency of the WSGI entry point, full vs LEAN_STARTUP"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/builds/')
+        parser.add_argument('--runs', type=int, default=5)
+
+    def handle(self, *args, **options):
+        for label, lean in (('full', '0'), ('lean', '1')):
+            samples = [self.probe(options['path'], lean) for _ in range(options['runs'])]
+            import_ms = statistics.median(s['import'] for s in samples) * 1000
+            request_ms = statistics.median(s['first_request'] for s in samples) * 1000
+            self.stdout.write(
+                f"{label:<5} import {import_ms:7.1f} ms  first request {request_ms:7.1f} ms  "
+                f"total {import_ms + request_ms:7.1f} ms  ({samples[0]['status']})"
+            )
+
+    def probe(self, path, lean):
+        env = dict(os.environ, LEAN_STARTUP=lean, DJANGO_SETTINGS_MODULE=os.environ['DJANGO_SETTINGS_MODULE'])
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE, path],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.importer import DEFAULT_CHUNK_SIZE, import_builds, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import builds and components from a CSV or NDJSON file, resumable via a checkpoint file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'])
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--checkpoint', help="JSON file recording the last committed row; resumes from it if present")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        fmt = options['format'] or ('csv' if path.suffix.lower() == '.csv' else 'ndjson')
+        checkpoint = Path(options['checkpoint']) if options['checkpoint'] else None
+
+        start_after = 0
+        if checkpoint and checkpoint.exists():
+            start_after = json.loads(checkpoint.read_text()).get('lastRow', 0)
+            self.stdout.write(f"Resuming after row {start_after}")
+
+        def on_chunk(report):
+            if checkpoint:
+                checkpoint.write_text(json.dumps({'lastRow': report['lastRow']}))
+            self.stdout.write(f"row {report['lastRow']}: {report['imported']} imported, {report['failed']} failed")
+
+        try:
+            with path.open(newline='', encoding='utf-8') as stream:
+                report = import_builds(read_rows(stream, fmt), options['chunk_size'], start_after, on_chunk)
+        except OSError as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['imported']} builds and {report['components']} components, {report['failed']} rows failed"
+        ))
@@ -0,0 +1,23 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app import views  # noqa: F401  registers the task handlers
+from app.tasks import drain
+
+
+class Command(BaseCommand):
+    help = "Process queued background tasks; runs until stopped unless --once is given"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Drain the queue and exit")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = drain()
+            if processed:
+                self.stdout.write(f"Processed {processed} tasks")
+            if options['once']:
+                break
+            time.sleep(settings.TASK_POLL_INTERVAL)
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.snapshot import dump_snapshot
+
+
+class Command(BaseCommand):
+    help = "Stream all app tables to a compact gzipped NDJSON snapshot (faster alternative to dumpdata)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Output file, e.g. snapshot.ndjson.gz")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = dump_snapshot(options['path'])
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count} rows")
+        self.stdout.write(self.style.SUCCESS(f"Snapshot written in {time.perf_counter() - started:.2f}s"))
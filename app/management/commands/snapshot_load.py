@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.snapshot import load_snapshot
+
+
+class Command(BaseCommand):
+    help = "Replace all app tables with a snapshot written by snapshot_dump, in one transaction"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--noinput', action='store_false', dest='interactive')
+
+    def handle(self, *args, **options):
+        if options['interactive']:
+            answer = input("This deletes all existing builds, components, logs, checklists and users. Continue? [y/N] ")
+            if answer.lower() != 'y':
+                raise CommandError("Snapshot load cancelled.")
+
+        started = time.perf_counter()
+        try:
+            counts = load_snapshot(options['path'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        for label, count in counts.items():
+            self.stdout.write(f"{label}: {count} rows")
+        self.stdout.write(self.style.SUCCESS(f"Snapshot restored in {time.perf_counter() - started:.2f}s"))
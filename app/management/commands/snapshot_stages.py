@@ -0,0 +1,16 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from app.trends import take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Write the daily stage/builder/tester/location snapshots missing since the last run (through yesterday)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--until', type=date.fromisoformat, help="Last day to snapshot, YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        days = take_snapshots(options['until'])
+        self.stdout.write(self.style.SUCCESS(f"Done, {days} days snapshotted"))
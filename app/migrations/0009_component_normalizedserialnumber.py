@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:47
+
+import re
+
+from django.db import migrations, models
+
+
+def backfill_normalized_serials(apps, schema_editor):
+    Component = apps.get_model("app", "Component")
+    alias = schema_editor.connection.alias
+    batch = []
+    for component in Component.objects.using(alias).exclude(serialNumber__isnull=True).only("id", "serialNumber").iterator():
+        component.normalizedSerialNumber = re.sub(r"[\s\-_/]", "", component.serialNumber).upper() or None
+        batch.append(component)
+        if len(batch) >= 1000:
+            Component.objects.using(alias).bulk_update(batch, ["normalizedSerialNumber"])
+            batch = []
+    if batch:
+        Component.objects.using(alias).bulk_update(batch, ["normalizedSerialNumber"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0008_build_dateoffinalpayment_build_dateofinitialpayment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="component",
+            name="normalizedSerialNumber",
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100, null=True),
+        ),
+        migrations.RunPython(backfill_normalized_serials, migrations.RunPython.noop),
+    ]
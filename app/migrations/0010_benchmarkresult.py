@@ -0,0 +1,126 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:48
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of the parsers in app/benchmarks.py, so later edits there don't change this migration
+NUMBER_RE = re.compile(r"(?:(?<!\S)-)?\d+(?:\.\d+)?")
+GROUPED_NUMBER_RE = re.compile(r"(?:(?<!\S)-)?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?")
+
+
+def parse_number(text):
+    if not text:
+        return None
+    match = GROUPED_NUMBER_RE.search(text)
+    return float(match.group().replace(",", "")) if match else None
+
+
+def parse_triplet(text):
+    if not text:
+        return None, None, None
+    values = [float(v) for v in NUMBER_RE.findall(text)][:3]
+    return tuple(values + [None] * (3 - len(values)))
+
+
+def parse_duration(text):
+    if not text:
+        return None
+    text = text.strip().lower()
+    if ":" in text:
+        try:
+            parts = [float(p) for p in text.split(":")]
+        except ValueError:
+            return None
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + part
+        return seconds
+    units = re.findall(r"(\d+(?:\.\d+)?)\s*(h|m|s)", text)
+    if units:
+        scale = {"h": 3600, "m": 60, "s": 1}
+        return sum(float(value) * scale[unit] for value, unit in units)
+    return parse_number(text)
+
+
+def parse_checklist_metrics(checklist):
+    cpu_idle, cpu_load, cpu_stress = parse_triplet(
+        checklist.cpuTemperatureIdleLoadStress
+    )
+    gpu_idle, gpu_load, gpu_stress = parse_triplet(
+        checklist.gpuTemperatureIdleLoadStress
+    )
+    return {
+        "cinebenchSingle": parse_number(checklist.cinebenchR23SingleCoreStock),
+        "cinebenchMulti": parse_number(checklist.cinebenchR23MulticoreStock),
+        "cpuTempIdle": cpu_idle,
+        "cpuTempLoad": cpu_load,
+        "cpuTempStress": cpu_stress,
+        "gpuTempIdle": gpu_idle,
+        "gpuTempLoad": gpu_load,
+        "gpuTempStress": gpu_stress,
+        "game1AvgFps": parse_number(checklist.game1AvgFps),
+        "game2AvgFps": parse_number(checklist.game2AvgFps),
+        "premiereRenderSeconds": parse_duration(checklist.premiereRenderTime),
+    }
+
+
+def backfill_benchmark_results(apps, schema_editor):
+    Checklist = apps.get_model("app", "Checklist")
+    BenchmarkResult = apps.get_model("app", "BenchmarkResult")
+    alias = schema_editor.connection.alias
+    batch = []
+    for checklist in Checklist.objects.using(alias).iterator():
+        batch.append(
+            BenchmarkResult(checklist=checklist, **parse_checklist_metrics(checklist))
+        )
+        if len(batch) >= 500:
+            BenchmarkResult.objects.using(alias).bulk_create(batch)
+            batch = []
+    if batch:
+        BenchmarkResult.objects.using(alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0009_component_normalizedserialnumber"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BenchmarkResult",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cinebenchSingle", models.FloatField(blank=True, null=True)),
+                ("cinebenchMulti", models.FloatField(blank=True, null=True)),
+                ("cpuTempIdle", models.FloatField(blank=True, null=True)),
+                ("cpuTempLoad", models.FloatField(blank=True, null=True)),
+                ("cpuTempStress", models.FloatField(blank=True, null=True)),
+                ("gpuTempIdle", models.FloatField(blank=True, null=True)),
+                ("gpuTempLoad", models.FloatField(blank=True, null=True)),
+                ("gpuTempStress", models.FloatField(blank=True, null=True)),
+                ("game1AvgFps", models.FloatField(blank=True, null=True)),
+                ("game2AvgFps", models.FloatField(blank=True, null=True)),
+                ("premiereRenderSeconds", models.FloatField(blank=True, null=True)),
+                (
+                    "checklist",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="benchmark",
+                        to="app.checklist",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_benchmark_results, migrations.RunPython.noop),
+    ]
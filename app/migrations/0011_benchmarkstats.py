@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:49
+
+import hashlib
+import random
+
+from django.db import migrations, models
+
+# Frozen copies from app/benchmarks.py, so later edits there don't change this migration
+METRIC_FIELDS = [
+    "cinebenchSingle",
+    "cinebenchMulti",
+    "cpuTempIdle",
+    "cpuTempLoad",
+    "cpuTempStress",
+    "premiereRenderSeconds",
+    "game1AvgFps",
+    "game2AvgFps",
+    "gpuTempIdle",
+    "gpuTempLoad",
+    "gpuTempStress",
+]
+
+
+def component_signature(names):
+    key = "\n".join(sorted(name.strip().upper() for name in names if name))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def backfill_benchmark_stats(apps, schema_editor):
+    Component = apps.get_model("app", "Component")
+    BenchmarkResult = apps.get_model("app", "BenchmarkResult")
+    BenchmarkStats = apps.get_model("app", "BenchmarkStats")
+    alias = schema_editor.connection.alias
+
+    names = {}
+    for build_id, name in Component.objects.using(alias).values_list(
+        "build_id", "name"
+    ):
+        names.setdefault(build_id, []).append(name)
+
+    values = {}
+    results = list(BenchmarkResult.objects.using(alias).select_related("checklist"))
+    for result in results:
+        result.signature = component_signature(names.get(result.checklist.build_id, []))
+        for metric in METRIC_FIELDS:
+            value = getattr(result, metric)
+            if value is not None:
+                values.setdefault((result.signature, metric), []).append(value)
+    BenchmarkResult.objects.using(alias).bulk_update(
+        results, ["signature"], batch_size=500
+    )
+
+    stats = []
+    for (signature, metric), samples in values.items():
+        count = len(samples)
+        mean = sum(samples) / count
+        m2 = sum((value - mean) ** 2 for value in samples)
+        if count > 500:
+            samples = random.sample(samples, 500)
+        stats.append(
+            BenchmarkStats(
+                signature=signature,
+                metric=metric,
+                count=count,
+                mean=mean,
+                m2=m2,
+                samples=sorted(samples),
+            )
+        )
+    BenchmarkStats.objects.using(alias).bulk_create(stats, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0010_benchmarkresult"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="benchmarkresult",
+            name="signature",
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.CreateModel(
+            name="BenchmarkStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("signature", models.CharField(max_length=64)),
+                ("metric", models.CharField(max_length=50)),
+                ("count", models.IntegerField(default=0)),
+                ("mean", models.FloatField(default=0)),
+                ("m2", models.FloatField(default=0)),
+                ("samples", models.JSONField(default=list)),
+            ],
+            options={
+                "unique_together": {("signature", "metric")},
+            },
+        ),
+        migrations.RunPython(backfill_benchmark_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0012_task"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="build",
+            index=models.Index(
+                fields=["enquiryId", "mobileNumber"],
+                name="app_build_enquiry_bb12c6_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:01
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of app/scheduler.py with settings.STAGE_ESTIMATE_DAYS as it was
+# when this migration was written, so later edits don't change it
+STAGE_ESTIMATE_DAYS = {
+    "Components Pending": 2,
+    "Components Assigned": 1,
+    "Build Started": 1,
+    "Build Completed": 1,
+    "Testing Started": 1,
+    "Test Completed": 1,
+    "Ready for Shipment": 1,
+}
+
+
+def compute_schedule(deadline, stage, parts_ready_by):
+    stages = list(STAGE_ESTIMATE_DAYS)
+    remaining = (
+        sum(STAGE_ESTIMATE_DAYS[s] for s in stages[stages.index(stage) :])
+        if stage in stages
+        else 0
+    )
+    latest_start = deadline - timedelta(days=remaining)
+    parts_slack = (latest_start - parts_ready_by).days if parts_ready_by else None
+    return latest_start, parts_slack
+
+
+def backfill_build_schedules(apps, schema_editor):
+    Build = apps.get_model("app", "Build")
+    Component = apps.get_model("app", "Component")
+    BuildSchedule = apps.get_model("app", "BuildSchedule")
+    alias = schema_editor.connection.alias
+
+    parts_ready = {}
+    pending = (
+        Component.objects.using(alias)
+        .filter(eta__isnull=False)
+        .filter(models.Q(serialNumber__isnull=True) | models.Q(serialNumber=""))
+    )
+    for build_id, eta in pending.values_list("build_id", "eta"):
+        parts_ready[build_id] = max(eta, parts_ready.get(build_id, eta))
+
+    rows = []
+    builds = Build.objects.using(alias).exclude(currentStage="Shipped")
+    for build_id, deadline, stage in builds.values_list(
+        "id", "deadline", "currentStage"
+    ):
+        latest_start, parts_slack = compute_schedule(
+            deadline, stage, parts_ready.get(build_id)
+        )
+        rows.append(
+            BuildSchedule(
+                build_id=build_id,
+                latestStart=latest_start,
+                partsReadyBy=parts_ready.get(build_id),
+                partsSlack=parts_slack,
+            )
+        )
+    BuildSchedule.objects.using(alias).bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0013_build_enquiry_mobile_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BuildSchedule",
+            fields=[
+                (
+                    "build",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="schedule",
+                        serialize=False,
+                        to="app.build",
+                    ),
+                ),
+                ("latestStart", models.DateField(db_index=True)),
+                ("partsReadyBy", models.DateField(blank=True, null=True)),
+                (
+                    "partsSlack",
+                    models.IntegerField(blank=True, db_index=True, null=True),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_build_schedules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0014_buildschedule"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="build",
+            index=models.Index(
+                fields=["currentStage", "deadline"], name="app_build_current_abf522_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_opening_payments(apps, schema_editor):
+    # One opening entry per build so the ledger sums match paymentDone
+    Build = apps.get_model("app", "Build")
+    Payment = apps.get_model("app", "Payment")
+    alias = schema_editor.connection.alias
+    payments = [
+        Payment(
+            build_id=build_id,
+            amount=paid,
+            paidOn=initial or ordered,
+            note="Opening balance",
+        )
+        for build_id, paid, initial, ordered in Build.objects.using(alias).filter(
+            paymentDone__gt=0
+        ).values_list("id", "paymentDone", "dateOfInitialPayment", "orderDate")
+    ]
+    Payment.objects.using(alias).bulk_create(payments, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0015_build_stage_deadline_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Payment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("paidOn", models.DateField(db_index=True)),
+                ("method", models.CharField(blank=True, max_length=50, null=True)),
+                ("note", models.CharField(blank=True, max_length=200, null=True)),
+                ("recordedBy", models.CharField(blank=True, max_length=100, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="build",
+            index=models.Index(
+                fields=["balancePayment"], name="app_build_balance_80e0d6_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="payment",
+            name="build",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="payments",
+                to="app.build",
+            ),
+        ),
+        migrations.RunPython(backfill_opening_payments, migrations.RunPython.noop),
+    ]
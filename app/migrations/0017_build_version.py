@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0016_payment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="build",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
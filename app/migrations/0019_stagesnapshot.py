@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0018_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StageSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField()),
+                (
+                    "dimension",
+                    models.CharField(
+                        choices=[
+                            ("stage", "stage"),
+                            ("builder", "builder"),
+                            ("tester", "tester"),
+                            ("location", "location"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("key", models.CharField(max_length=100)),
+                ("count", models.IntegerField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="statuslog",
+            index=models.Index(
+                fields=["timestamp"], name="app_statusl_timesta_5a66a9_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="stagesnapshot",
+            unique_together={("dimension", "day", "key")},
+        ),
+    ]
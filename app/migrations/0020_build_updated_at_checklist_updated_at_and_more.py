@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:30
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0019_stagesnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="build",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_default=django.db.models.functions.datetime.Now(),
+                db_index=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="checklist",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_default=django.db.models.functions.datetime.Now(),
+                db_index=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="component",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True,
+                db_default=django.db.models.functions.datetime.Now(),
+                db_index=True,
+            ),
+        ),
+    ]
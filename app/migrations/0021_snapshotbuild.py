@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:32
+
+from datetime import datetime, time, timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_counted_builds(apps, schema_editor):
+    # Builds the stored snapshots already count: ordered, or logged before an
+    # early order date, on or before the latest snapshot day
+    Build = apps.get_model("app", "Build")
+    SnapshotBuild = apps.get_model("app", "SnapshotBuild")
+    StageSnapshot = apps.get_model("app", "StageSnapshot")
+    StatusLog = apps.get_model("app", "StatusLog")
+    alias = schema_editor.connection.alias
+    last_day = StageSnapshot.objects.using(alias).aggregate(last=models.Max("day"))[
+        "last"
+    ]
+    if last_day is None:
+        return
+    day_end = timezone.make_aware(
+        datetime.combine(last_day + timedelta(days=1), time.min)
+    )
+    logged = set(
+        StatusLog.objects.using(alias)
+        .filter(timestamp__lt=day_end)
+        .values_list("build_id", flat=True)
+    )
+    entries = [
+        SnapshotBuild(build_id=build_id, day=min(ordered, last_day))
+        for build_id, ordered in Build.objects.using(alias).values_list(
+            "id", "orderDate"
+        )
+        if ordered <= last_day or build_id in logged
+    ]
+    SnapshotBuild.objects.using(alias).bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0020_build_updated_at_checklist_updated_at_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SnapshotBuild",
+            fields=[
+                (
+                    "build",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="snapshot_entry",
+                        serialize=False,
+                        to="app.build",
+                    ),
+                ),
+                ("day", models.DateField()),
+            ],
+        ),
+        migrations.RunPython(backfill_counted_builds, migrations.RunPython.noop),
+    ]
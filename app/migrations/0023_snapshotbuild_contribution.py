@@ -0,0 +1,92 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:05
+
+from datetime import datetime, time, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_contributions(apps, schema_editor):
+    # What each build counted by the stored snapshots contributes at the end
+    # of the latest snapshot day: its stage then, and while not shipped its
+    # location and the builder and tester assigned by that day
+    Build = apps.get_model("app", "Build")
+    SnapshotBuild = apps.get_model("app", "SnapshotBuild")
+    StageSnapshot = apps.get_model("app", "StageSnapshot")
+    StatusLog = apps.get_model("app", "StatusLog")
+    alias = schema_editor.connection.alias
+    last_day = StageSnapshot.objects.using(alias).aggregate(last=models.Max("day"))[
+        "last"
+    ]
+    if last_day is None:
+        return
+    day_end = timezone.make_aware(
+        datetime.combine(last_day + timedelta(days=1), time.min)
+    )
+    stages = dict(
+        StatusLog.objects.using(alias)
+        .filter(timestamp__lt=day_end)
+        .order_by("build_id", "timestamp", "id")
+        .values_list("build_id", "status")
+    )
+
+    def assigned(name, assigned_at):
+        if name and assigned_at and timezone.localtime(assigned_at).date() <= last_day:
+            return name
+        return None
+
+    entries = []
+    for build in Build.objects.using(alias).iterator(chunk_size=500):
+        if build.orderDate > last_day and build.id not in stages:
+            continue
+        stage = stages.get(build.id, "Components Pending")
+        shipped = stage == "Shipped"
+        entries.append(
+            SnapshotBuild(
+                build_id=build.id,
+                day=min(build.orderDate, last_day),
+                stage=stage,
+                location=None if shipped else build.location,
+                builder=None if shipped else assigned(build.builder, build.builderAssignedDate),
+                tester=None if shipped else assigned(build.tester, build.testerAssignedDate),
+            )
+        )
+    SnapshotBuild.objects.using(alias).bulk_create(entries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0022_idempotencykey_claimed_at"),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name="SnapshotBuild",
+        ),
+        migrations.CreateModel(
+            name="SnapshotBuild",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("build_id", models.IntegerField(db_index=True)),
+                ("day", models.DateField()),
+                ("stage", models.CharField(max_length=50)),
+                (
+                    "location",
+                    models.CharField(blank=True, max_length=100, null=True),
+                ),
+                ("builder", models.CharField(blank=True, max_length=100, null=True)),
+                ("tester", models.CharField(blank=True, max_length=100, null=True)),
+                ("deleted_on", models.DateField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_contributions, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,18 @@
+import bisect
+import math
+import random
+import re
+
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models.functions import Now
+from django.utils import timezone
+
+from .benchmarks import METRIC_FIELDS, component_signature, parse_checklist_metrics, percentile
+from .scheduler import compute_schedule
+from .assignments import assignment_index
+from .throttling import bump_data_version
 
 # Define user roles
 ROLE_CHOICES = [
@@ -92,6 +105,18 @@ class Build(models.Model):
         ('In Transit', 'In Transit'),
         ('Delivered', 'Delivered')])
     trackingNumber = models.CharField(max_length=100, null=True, blank=True)
+    # Incremented on every write to the row; exposed as the ETag for If-Match updates
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Change marker for incremental exports; every write path moves it
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now(), db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['enquiryId', 'mobileNumber']),
+            models.Index(fields=['currentStage', 'deadline']),
+            models.Index(fields=['balancePayment']),
+        ]
+
     @property
     def paymentStatus(self):
         if self.paymentDone >= self.totalAmount:
@@ -99,7 +124,7 @@ class Build(models.Model):
         elif self.paymentDone > 0:
             return "Partial"
         else:
-            return "Completed"
+            return "Pending"
     @property
     def buildCompletedOnSameDay(self):
         return self.builderAssignedDate == self.statusLog.status == "Build Completed" and self.statusLog.created_at.date()
@@ -120,15 +145,87 @@ class Build(models.Model):
             return self.testerAssignedDate
         return None
     
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if not adding:
+            # Bumped in the UPDATE itself, so a writer holding a stale copy still moves the
+            # version on and invalidates every ETag handed out before it
+            self.version = models.F('version') + 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'version', 'updated_at'}
+        super().save(*args, **kwargs)
+        if not adding:
+            self.refresh_from_db(fields=['version'])
+        self._after_write()
+
+    def save_changed(self, fields, expected_version=None):
+        """
+        Write only the given fields (and the version) with one conditional
+        UPDATE. Returns False, leaving the row untouched, when expected_version
+        is given and no longer matches the stored version.
+        """
+        rows = Build.objects.filter(pk=self.pk)
+        if expected_version is not None:
+            rows = rows.filter(version=expected_version)
+        changes = {name: getattr(self, name) for name in fields}
+        if not rows.update(version=models.F('version') + 1, updated_at=timezone.now(), **changes):
+            return False
+        if expected_version is not None:
+            self.version = expected_version + 1
+        else:
+            self.refresh_from_db(fields=['version'])
+        self._after_write()
+        return True
+
+    def _after_write(self):
+        BuildSchedule.refresh([self.id])
+        assignment_index.observe(self)
+        bump_data_version()
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=self._state.db):
+            # The next snapshot run takes the build off the carried-over counts
+            SnapshotBuild.objects.using(self._state.db).filter(build_id=self.id, deleted_on__isnull=True) \
+                .update(deleted_on=timezone.localdate())
+            result = super().delete(*args, **kwargs)
+        bump_data_version()
+        return result
+
     def __str__(self):
         return f"{self.customerName} - {self.enquiryId} ({self.currentStage})"
+def normalize_serial(serial):
+    # Serials are typed by hand or scanned, so ignore case and separators
+    if not serial:
+        return None
+    return re.sub(r'[\s\-_/]', '', serial).upper() or None
+
+
 class Component(models.Model):
     build = models.ForeignKey(Build, on_delete=models.CASCADE, related_name='components')
     price = models.IntegerField()
     name = models.CharField(max_length=100)
     serialNumber = models.CharField(max_length=100, null=True, blank=True)
+    normalizedSerialNumber = models.CharField(max_length=100, null=True, blank=True, editable=False, db_index=True)
     eta = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now(), db_index=True)
+
+    def save(self, *args, **kwargs):
+        self.normalizedSerialNumber = normalize_serial(self.serialNumber)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'updated_at'}
+            if 'serialNumber' in update_fields:
+                kwargs['update_fields'] |= {'normalizedSerialNumber'}
+        super().save(*args, **kwargs)
+        BuildSchedule.refresh([self.build_id])
+        bump_data_version()
 
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        BuildSchedule.refresh([self.build_id])
+        bump_data_version()
+        return result
 
     @property
     def available(self):
@@ -136,6 +233,74 @@ class Component(models.Model):
 
     def __str__(self):
         return f"{self.name} - {self.build.customerName} ({self.build.enquiryId})"
+class BuildSchedule(models.Model):
+    # At-risk queue for unshipped builds, kept current by Build.save and Component.save/delete
+    build = models.OneToOneField(Build, on_delete=models.CASCADE, primary_key=True, related_name='schedule')
+    latestStart = models.DateField(db_index=True)
+    partsReadyBy = models.DateField(null=True, blank=True)
+    partsSlack = models.IntegerField(null=True, blank=True, db_index=True)
+
+    @classmethod
+    def refresh(cls, build_ids):
+        builds = Build.objects.filter(id__in=build_ids).exclude(currentStage='Shipped').values_list('id', 'deadline', 'currentStage')
+        parts_ready = dict(
+            Component.objects
+            .filter(build_id__in=build_ids, eta__isnull=False)
+            .filter(models.Q(serialNumber__isnull=True) | models.Q(serialNumber=''))
+            .values('build_id')
+            .annotate(latest=models.Max('eta'))
+            .values_list('build_id', 'latest')
+        )
+        rows = []
+        for build_id, deadline, stage in builds:
+            latest_start, parts_slack = compute_schedule(deadline, stage, parts_ready.get(build_id))
+            rows.append(cls(build_id=build_id, latestStart=latest_start, partsReadyBy=parts_ready.get(build_id), partsSlack=parts_slack))
+        with transaction.atomic():
+            cls.objects.filter(build_id__in=build_ids).delete()
+            cls.objects.bulk_create(rows)
+
+    def __str__(self):
+        return f"Schedule for Build {self.build_id}"
+
+
+class Payment(models.Model):
+    # Append-only ledger; Build.paymentDone/balancePayment are the running totals
+    build = models.ForeignKey(Build, on_delete=models.CASCADE, related_name='payments')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    paidOn = models.DateField(db_index=True)
+    method = models.CharField(max_length=50, null=True, blank=True)
+    note = models.CharField(max_length=200, null=True, blank=True)
+    recordedBy = models.CharField(max_length=100, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    @classmethod
+    def record(cls, build, **fields):
+        # Insert the payment and move the build's running totals in one transaction
+        with transaction.atomic():
+            payment = cls.objects.create(build=build, **fields)
+            Build.objects.filter(pk=build.pk).update(
+                version=models.F('version') + 1,
+                updated_at=timezone.now(),
+                paymentDone=models.F('paymentDone') + payment.amount,
+                balancePayment=models.F('balancePayment') - payment.amount,
+            )
+            Build.objects.filter(pk=build.pk, dateOfInitialPayment__isnull=True).update(dateOfInitialPayment=payment.paidOn)
+            Build.objects.filter(pk=build.pk, balancePayment__lte=0, dateOfFinalPayment__isnull=True).update(dateOfFinalPayment=payment.paidOn)
+        build.refresh_from_db(fields=['paymentDone', 'balancePayment', 'dateOfInitialPayment', 'dateOfFinalPayment', 'version'])
+        bump_data_version()
+        return payment
+
+    @classmethod
+    def opening_entry(cls, build):
+        # Unsaved ledger row for what was already paid when the build was entered, or None
+        if not build.paymentDone or build.paymentDone <= 0:
+            return None
+        return cls(build_id=build.id, amount=build.paymentDone, paidOn=build.dateOfInitialPayment or build.orderDate, note="Opening balance")
+
+    def __str__(self):
+        return f"{self.amount} for Build {self.build_id} on {self.paidOn}"
+
+
 class StatusLog(models.Model):
     build = models.ForeignKey(Build, on_delete=models.CASCADE, related_name='status_logs')
     status = models.CharField(max_length=50)
@@ -148,6 +313,15 @@ class StatusLog(models.Model):
     role = models.CharField(max_length=100, null=True, blank=True)
     rollback_reason = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Daily stage snapshots replay logs from a timestamp onwards
+        indexes = [models.Index(fields=['timestamp'])]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        bump_data_version()
+
     def __str__(self):
         return f"{self.build.customerName} - {self.status} by {self.updated_by} on {self.timestamp}"
 
@@ -184,11 +358,211 @@ class Checklist(models.Model):
     testedBy = models.TextField()
 
     completed_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now(), db_index=True)
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            previous = BenchmarkResult.objects.filter(checklist=self).first()
+            metrics = parse_checklist_metrics(self)
+            signature = component_signature(self.build.components.values_list('name', flat=True))
+            self.benchmark_report = BenchmarkStats.record(signature, metrics, previous)
+            BenchmarkResult.objects.update_or_create(
+                checklist=self, defaults={'signature': signature, **metrics}
+            )
+        bump_data_version()
 
     def __str__(self):
         return f"Checklist for Build {self.build.id}"
 
+
+class BenchmarkResult(models.Model):
+    # Typed copy of the numeric Checklist results, kept in sync on Checklist.save
+    checklist = models.OneToOneField(Checklist, on_delete=models.CASCADE, related_name='benchmark')
+    signature = models.CharField(max_length=64, null=True, blank=True)
+    cinebenchSingle = models.FloatField(null=True, blank=True)
+    cinebenchMulti = models.FloatField(null=True, blank=True)
+    cpuTempIdle = models.FloatField(null=True, blank=True)
+    cpuTempLoad = models.FloatField(null=True, blank=True)
+    cpuTempStress = models.FloatField(null=True, blank=True)
+    gpuTempIdle = models.FloatField(null=True, blank=True)
+    gpuTempLoad = models.FloatField(null=True, blank=True)
+    gpuTempStress = models.FloatField(null=True, blank=True)
+    game1AvgFps = models.FloatField(null=True, blank=True)
+    game2AvgFps = models.FloatField(null=True, blank=True)
+    premiereRenderSeconds = models.FloatField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Benchmarks for Build {self.checklist.build_id}"
+
+
+class BenchmarkStats(models.Model):
+    # Running mean/variance (Welford) and a bounded sorted sample per component signature and metric
+    MAX_SAMPLES = 500
+    MIN_SAMPLES = 5
+    Z_THRESHOLD = 3.0
+
+    signature = models.CharField(max_length=64)
+    metric = models.CharField(max_length=50)
+    count = models.IntegerField(default=0)
+    mean = models.FloatField(default=0)
+    m2 = models.FloatField(default=0)
+    samples = models.JSONField(default=list)
+
+    class Meta:
+        unique_together = ('signature', 'metric')
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        bisect.insort(self.samples, value)
+        if len(self.samples) > self.MAX_SAMPLES:
+            # Random eviction keeps the sample representative once the cap is hit
+            self.samples.pop(random.randrange(len(self.samples)))
+
+    def remove(self, value):
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+        else:
+            delta = value - self.mean
+            self.count -= 1
+            self.mean -= delta / self.count
+            self.m2 = max(self.m2 - delta * (value - self.mean), 0.0)
+        index = bisect.bisect_left(self.samples, value)
+        if index < len(self.samples) and self.samples[index] == value:
+            self.samples.pop(index)
+
+    def score(self, value):
+        stddev = self.stddev
+        z_score = (value - self.mean) / stddev if stddev else 0.0
+        return {
+            'value': value,
+            'count': self.count,
+            'mean': self.mean,
+            'stddev': stddev,
+            'p5': percentile(self.samples, 0.05),
+            'p50': percentile(self.samples, 0.5),
+            'p95': percentile(self.samples, 0.95),
+            'zScore': z_score,
+            'outlier': self.count >= self.MIN_SAMPLES and abs(z_score) > self.Z_THRESHOLD,
+        }
+
+    @classmethod
+    def record(cls, signature, metrics, previous=None):
+        # Score new metrics against history for this signature, then fold them into the stats
+        previous_signature = getattr(previous, 'signature', None)
+        stats = {
+            (entry.signature, entry.metric): entry
+            for entry in cls.objects.select_for_update().filter(signature__in={signature, previous_signature})
+        }
+
+        if previous_signature:
+            for metric in METRIC_FIELDS:
+                old_value = getattr(previous, metric)
+                entry = stats.get((previous_signature, metric))
+                if old_value is not None and entry is not None:
+                    entry.remove(old_value)
+
+        report = {}
+        for metric, value in metrics.items():
+            if value is None:
+                continue
+            entry = stats.setdefault((signature, metric), cls(signature=signature, metric=metric))
+            report[metric] = entry.score(value)
+            entry.add(value)
+
+        for entry in stats.values():
+            entry.save()
+        return {
+            'signature': signature,
+            'metrics': report,
+            'outliers': [metric for metric, result in report.items() if result['outlier']],
+        }
+
 class InvoiceStatus(models.Model):
     build = models.OneToOneField(Build, on_delete=models.CASCADE, related_name='invoice_status')
     invoice_raised = models.BooleanField(default=False)
     sales_order_raised = models.BooleanField(default=False)
+
+
+class Task(models.Model):
+    # Durable queue for post-write side effects, see app/tasks.py
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=32, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.status}, attempt {self.attempts})"
+
+
+class IdempotencyKey(models.Model):
+    # Stored responses for retried POSTs, see app/idempotency.py
+    key = models.CharField(max_length=64, primary_key=True)  # sha256 of user, endpoint and client key
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)  # null while the first request runs
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(default=timezone.now)  # when the request now running under the key started
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.key[:12]} ({self.status_code or 'in progress'})"
+
+
+class StageSnapshot(models.Model):
+    # End-of-day board counts for trend charts, filled by app/trends.py
+    DIMENSIONS = ['stage', 'builder', 'tester', 'location']
+
+    day = models.DateField()
+    dimension = models.CharField(max_length=10, choices=[(dimension, dimension) for dimension in DIMENSIONS])
+    key = models.CharField(max_length=100)
+    count = models.IntegerField()
+
+    class Meta:
+        # Also the index behind range reads: WHERE dimension IN (...) AND day BETWEEN ...
+        unique_together = ('dimension', 'day', 'key')
+
+    def __str__(self):
+        return f"{self.day} {self.dimension}={self.key}: {self.count}"
+
+
+class SnapshotBuild(models.Model):
+    # Builds already counted in StageSnapshot, the day they were added and what
+    # they count for as of the latest snapshot, so a build entered after the
+    # fact is counted exactly once and a deleted one can be taken off again.
+    # Not a foreign key: the entry has to outlive the build it describes.
+    build_id = models.IntegerField(db_index=True)
+    day = models.DateField()
+    stage = models.CharField(max_length=50)
+    # Null where the build doesn't count: shipped, or not assigned yet
+    location = models.CharField(max_length=100, null=True, blank=True)
+    builder = models.CharField(max_length=100, null=True, blank=True)
+    tester = models.CharField(max_length=100, null=True, blank=True)
+    deleted_on = models.DateField(null=True, blank=True)
+
+    def contribution(self):
+        return {'stage': self.stage, 'location': self.location, 'builder': self.builder, 'tester': self.tester}
+
+    def __str__(self):
+        return f"Build {self.build_id} counted from {self.day}"
@@ -0,0 +1,155 @@
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Bump when the layout changes so every cached report is re-rendered
+REPORT_LAYOUT_VERSION = 1
+
+BUILD_FIELDS = [
+    'id', 'customerName', 'enquiryId', 'buildType', 'deliveryType', 'location', 'orderDate',
+    'builder', 'tester', 'qualityCheckBy', 'qualityCheckDate',
+]
+CHECKLIST_SECTIONS = [
+    ('Drivers & firmware', [
+        'chipsetDrivers', 'graphicsDrivers', 'biosFirmwareVersion', 'networkDrivers',
+    ]),
+    ('Connectivity & I/O', [
+        'wifi', 'bluetooth', 'lanDetection', 'usbDetection', 'headphone',
+    ]),
+    ('System setup', [
+        'storagePartitioning', 'adminName', 'resizableBar', 'ramXmpProfile', 'operatingSystem',
+        'antivirusActivation', 'basicSoftwareInstallation',
+    ]),
+    ('Benchmarks & stress tests', [
+        'prime95Test', 'cinebenchR23SingleCoreStock', 'cinebenchR23MulticoreStock',
+        'cpuTemperatureIdleLoadStress', 'gpuTemperatureIdleLoadStress', 'game1AvgFps', 'game2AvgFps',
+        'premiereRenderTime',
+    ]),
+    ('Sign-off', ['dateOfBenchmark', 'buildBy', 'testedBy']),
+]
+
+_pool = None
+_pool_lock = threading.RLock()
+_in_flight = {}
+
+
+def report_data(build_id):
+    """
+    The rows a QA report is rendered from, as plain JSON-ready values, or None
+    when the build has no checklist yet. Two queries.
+    """
+    from .models import Build
+
+    build = (
+        Build.objects
+        .select_related('checklist')
+        .prefetch_related('components')
+        .filter(pk=build_id)
+        .first()
+    )
+    checklist = getattr(build, 'checklist', None) if build else None
+    if checklist is None:
+        return None
+    data = {
+        'layout': REPORT_LAYOUT_VERSION,
+        'build': {field: getattr(build, field) for field in BUILD_FIELDS},
+        'components': [
+            {'name': component.name, 'serialNumber': component.serialNumber}
+            for component in sorted(build.components.all(), key=lambda component: component.id)
+        ],
+        'checklist': {field: getattr(checklist, field) for _, fields in CHECKLIST_SECTIONS for field in fields},
+    }
+    # Round-trip so dates are strings and the worker process gets plain data
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def content_hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def report_path(build_id, digest):
+    return Path(settings.REPORT_CACHE_DIR) / f"{build_id}-{digest}.html"
+
+
+def render_report(data):
+    # Pure function of the report data; runs in a worker process
+    def esc(value):
+        return html.escape('' if value is None else str(value))
+
+    def rows(pairs):
+        return ''.join(f"<tr><th>{esc(label)}</th><td>{esc(value)}</td></tr>" for label, value in pairs)
+
+    build = data['build']
+
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">",
+        f"<title>QA report - Build {esc(build['id'])}</title>",
+        "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;width:100%;margin-bottom:1.5em}"
+        "th,td{border:1px solid #ccc;padding:4px 8px;text-align:left}th{width:35%;background:#f5f5f5}"
+        "@media print{body{margin:0}}</style></head><body>",
+        f"<h1>QA report - Build {esc(build['id'])}</h1>",
+        f"<table>{rows((field, build[field]) for field in BUILD_FIELDS[1:])}</table>",
+        "<h2>Components</h2><table>",
+        rows((component['name'], component['serialNumber']) for component in data['components']),
+        "</table>",
+    ]
+    for title, fields in CHECKLIST_SECTIONS:
+        parts.append(f"<h2>{esc(title)}</h2><table>{rows((field, data['checklist'][field]) for field in fields)}</table>")
+    parts.append("</body></html>")
+    return ''.join(parts).encode('utf-8')
+
+
+def render_to_file(data, path):
+    # Worker side: write atomically, then drop older renders of the same build
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    tmp.write_bytes(render_report(data))
+    os.replace(tmp, path)
+    for stale in path.parent.glob(f"{data['build']['id']}-*.html"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return str(path)
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers don't inherit the server's threads or database connections
+            _pool = ProcessPoolExecutor(settings.REPORT_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def request_report(build_id):
+    """
+    Returns (path, digest, future) for the build's current report. The file
+    exists when future is None; otherwise rendering was queued (or already
+    running) in the process pool. Returns None when there is nothing to render.
+    """
+    data = report_data(build_id)
+    if data is None:
+        return None
+    digest = content_hash(data)
+    path = report_path(build_id, digest)
+    if path.exists():
+        return path, digest, None
+    with _pool_lock:
+        future = _in_flight.get(digest)
+        if future is None:
+            future = _in_flight[digest] = get_pool().submit(render_to_file, data, str(path))
+            future.add_done_callback(lambda _: _forget(digest))
+    return path, digest, future
+
+
+def _forget(digest):
+    with _pool_lock:
+        _in_flight.pop(digest, None)
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.conf import settings
+
+# Builds are at risk when slack = latestStart - max(today, partsReadyBy) drops below a threshold.
+# That splits into two static, indexable terms: latestStart (date) and partsSlack (days),
+# since slack = min(latestStart - today, partsSlack).
+
+
+def remaining_days(stage):
+    stages = list(settings.STAGE_ESTIMATE_DAYS)
+    if stage not in stages:
+        return 0
+    return sum(settings.STAGE_ESTIMATE_DAYS[s] for s in stages[stages.index(stage):])
+
+
+def compute_schedule(deadline, stage, parts_ready_by):
+    latest_start = deadline - timedelta(days=remaining_days(stage))
+    parts_slack = (latest_start - parts_ready_by).days if parts_ready_by else None
+    return latest_start, parts_slack
+
+
+def slack_days(latest_start, parts_slack, today):
+    slack = (latest_start - today).days
+    return slack if parts_slack is None else min(slack, parts_slack)
@@ -1,12 +1,27 @@
-from rest_framework import serializers
-from .models import Build, Component, StatusLog, Checklist, InvoiceStatus
+from django.db import models, transaction
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+from .models import Build, BuildSchedule, Component, StatusLog, Checklist, InvoiceStatus, Payment
+
+class FieldsProjectionMixin:
+    # Accepts fields=[...] and drops every other declared field
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'The build was changed by someone else; reload it and retry.'
+    default_code = 'precondition_failed'
 
 class ComponentSerializer(serializers.ModelSerializer):
     available = serializers.SerializerMethodField()
 
     class Meta:
         model = Component
-        exclude = ['build']
+        exclude = ['build', 'normalizedSerialNumber']
 
     def get_available(self, obj):
         return obj.available
@@ -26,23 +41,51 @@ class BuildSerializer(serializers.ModelSerializer):
         # Alternatively: 
         # fields = [ ...existing fields..., 'valid_builder_assigned_date', 'valid_tester_assigned_date' ]
 
+    def get_extra_kwargs(self):
+        extra_kwargs = super().get_extra_kwargs()
+        if self.instance is not None:
+            # Once a build exists its totals only move through the Payment ledger (Payment.record)
+            for name in ('paymentDone', 'balancePayment'):
+                extra_kwargs.setdefault(name, {})['read_only'] = True
+        return extra_kwargs
+
     def create(self, validated_data):
         components_data = validated_data.pop('components', [])
-        build = Build.objects.create(**validated_data)
-        for comp_data in components_data:
-            Component.objects.create(build=build, **comp_data)
+        with transaction.atomic():
+            build = Build.objects.create(**validated_data)
+            opening = Payment.opening_entry(build)
+            if opening:
+                opening.save()
+            for comp_data in components_data:
+                Component.objects.create(build=build, **comp_data)
         return build
 
     def update(self, instance, validated_data):
         components_data = validated_data.pop('components', None)
 
-        # Update non-component fields
-        instance = super().update(instance, validated_data)
-
-        if components_data is not None:
-            instance.components.all().delete()
-            for comp_data in components_data:
-                Component.objects.create(build=instance, **comp_data)
+        # Update non-component fields, writing only the columns whose value changed.
+        # context['expected_version'] (from If-Match) makes the UPDATE conditional.
+        changed = [name for name, value in validated_data.items() if getattr(instance, name) != value]
+        for name in changed:
+            setattr(instance, name, validated_data[name])
+        if 'totalAmount' in changed:
+            # Against the stored paymentDone, in the same UPDATE, so a concurrent payment isn't lost
+            instance.balancePayment = instance.totalAmount - models.F('paymentDone')
+            changed.append('balancePayment')
+
+        with transaction.atomic():
+            if changed or components_data is not None:
+                if not instance.save_changed(changed, self.context.get('expected_version')):
+                    raise PreconditionFailed()
+            if 'balancePayment' in changed:
+                instance.refresh_from_db(fields=['paymentDone', 'balancePayment'])
+
+            if components_data is not None:
+                instance.components.all().delete()
+                for comp_data in components_data:
+                    Component.objects.create(build=instance, **comp_data)
+                # The bulk delete skips Component.delete, so an emptied list still needs the refresh
+                BuildSchedule.refresh([instance.id])
 
         return instance
 
@@ -64,12 +107,34 @@ class BuildSerializer(serializers.ModelSerializer):
             return obj.testerAssignedDate
         return None
 
-class StatusLogSerializer(serializers.ModelSerializer):
+class BuildImportSerializer(BuildSerializer):
+    # Bulk import checks primary-key clashes per chunk, so skip the per-row unique lookup
+    components = ComponentSerializer(many=True, required=False)
+
+    class Meta(BuildSerializer.Meta):
+        extra_kwargs = {'id': {'validators': []}}
+
+class SerialLookupSerializer(ComponentSerializer):
+    build = serializers.SerializerMethodField()
+
+    class Meta(ComponentSerializer.Meta):
+        exclude = ['normalizedSerialNumber']
+
+    def get_build(self, obj):
+        return {
+            'id': obj.build.id,
+            'customerName': obj.build.customerName,
+            'enquiryId': obj.build.enquiryId,
+            'currentStage': obj.build.currentStage,
+            'shipmentStatus': obj.build.shipmentStatus,
+        }
+
+class StatusLogSerializer(FieldsProjectionMixin, serializers.ModelSerializer):
     class Meta:
         model = StatusLog
         fields = '__all__'
 
-class ChecklistSerializer(serializers.ModelSerializer):
+class ChecklistSerializer(FieldsProjectionMixin, serializers.ModelSerializer):
     class Meta:
         model = Checklist
         fields = '__all__'
@@ -78,3 +143,15 @@ class InvoiceStatusSerializer(serializers.ModelSerializer):
     class Meta:
         model = InvoiceStatus
         fields = '__all__'
+
+
+class PaymentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Payment
+        fields = '__all__'
+        read_only_fields = ['build']
+
+    def validate_amount(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Amount must be positive.")
+        return value
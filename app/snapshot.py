@@ -0,0 +1,109 @@
+import gzip
+import json
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+SNAPSHOT_FORMAT = 'nuke-snapshot'
+SNAPSHOT_VERSION = 1
+CHUNK_SIZE = 2000
+# Queued tasks, stored Idempotency-Key responses and the trend tables rebuilt from
+# the status logs: not copied, and emptied on load since they'd describe other data
+TRANSIENT_MODELS = {'app.Task', 'app.IdempotencyKey', 'app.StageSnapshot', 'app.SnapshotBuild'}
+
+
+def app_models():
+    # App tables in dependency order, including the auto-created m2m tables of CustomUser
+    return list(apps.get_app_config('app').get_models(include_auto_created=True))
+
+
+def snapshot_models():
+    return [model for model in app_models() if model._meta.label not in TRANSIENT_MODELS]
+
+
+def dump_snapshot(path):
+    """
+    Write the app tables but the transient ones to a gzipped NDJSON file: a header line per table
+    followed by one JSON array per row, streamed in chunks.
+    """
+    counts = {}
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    with gzip.open(path, 'wt', encoding='utf-8') as out:
+        out.write(encoder.encode({'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION}) + '\n')
+        for model in snapshot_models():
+            fields = model._meta.concrete_fields
+            out.write(encoder.encode({'table': model._meta.label, 'columns': [f.column for f in fields]}) + '\n')
+            rows = model._base_manager.order_by('pk').values_list(*[f.attname for f in fields])
+            count = 0
+            for row in rows.iterator(chunk_size=CHUNK_SIZE):
+                out.write(encoder.encode(row) + '\n')
+                count += 1
+            counts[model._meta.label] = count
+    return counts
+
+
+def load_snapshot(path):
+    """
+    Replace the app tables with a snapshot in one transaction using raw
+    executemany inserts (no model save, signals or validation), then reset
+    the primary-key sequences. Transient tables are left empty, even when an
+    older snapshot holds them.
+    """
+    models = app_models()
+    counts = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as stream, transaction.atomic():
+        header = json.loads(next(stream))
+        if header.get('format') != SNAPSHOT_FORMAT or header.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Not a {SNAPSHOT_FORMAT} v{SNAPSHOT_VERSION} file")
+
+        with connection.cursor() as cursor:
+            for model in reversed(models):
+                cursor.execute(f"DELETE FROM {connection.ops.quote_name(model._meta.db_table)}")
+
+            loader = None
+            for line in stream:
+                item = json.loads(line)
+                if isinstance(item, dict):
+                    if loader:
+                        counts[loader.label] = loader.flush(cursor)
+                    loader = None if item['table'] in TRANSIENT_MODELS else _TableLoader(apps.get_model(item['table']), item['columns'])
+                elif loader:
+                    loader.add(item, cursor)
+            if loader:
+                counts[loader.label] = loader.flush(cursor)
+
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+    return counts
+
+
+class _TableLoader:
+    def __init__(self, model, columns):
+        by_column = {f.column: f for f in model._meta.concrete_fields}
+        self.label = model._meta.label
+        self.fields = [by_column[column] for column in columns]
+        quote = connection.ops.quote_name
+        self.sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            quote(model._meta.db_table),
+            ', '.join(quote(column) for column in columns),
+            ', '.join(['%s'] * len(columns)),
+        )
+        self.batch = []
+        self.count = 0
+
+    def add(self, row, cursor):
+        self.batch.append([
+            field.get_db_prep_save(field.to_python(value), connection)
+            for field, value in zip(self.fields, row)
+        ])
+        if len(self.batch) >= CHUNK_SIZE:
+            self.flush(cursor)
+
+    def flush(self, cursor):
+        if self.batch:
+            cursor.executemany(self.sql, self.batch)
+            self.count += len(self.batch)
+            self.batch = []
+        return self.count
@@ -0,0 +1,109 @@
+import threading
+from collections import defaultdict
+
+TOPICS = ('builds', 'components', 'stages', 'checklists', 'payments')
+ALL_TOPICS = frozenset(TOPICS)
+# What each role (ROLE_CHOICES) hears when it doesn't pass ?topics=; anonymous clients get everything
+ROLE_TOPICS = {
+    'Sales Team': frozenset({'builds', 'stages', 'payments'}),
+    'Service Team': frozenset({'builds', 'stages'}),
+    'Supervisor': ALL_TOPICS,
+    'Hardware Engineer TL': ALL_TOPICS,
+    'Hardware Engineer Team': frozenset({'builds', 'components', 'stages', 'checklists'}),
+    'Accounts Team': frozenset({'builds', 'payments'}),
+}
+
+
+def assignee_key(name):
+    return name.strip().lower() if name else None
+
+
+class Subscription:
+    __slots__ = ('topics', 'builds', 'assignee')
+
+    def __init__(self, topics, builds=None, assignee=None):
+        self.topics = topics
+        self.builds = builds  # set of build ids, or None for any build
+        self.assignee = assignee_key(assignee)  # only builds with this builder/tester
+
+    def keys(self):
+        # Index keys this subscription is filed under
+        for topic in self.topics:
+            if self.builds is not None:
+                for build_id in self.builds:
+                    yield ('build', topic, build_id)
+            elif self.assignee is not None:
+                yield ('assignee', topic, self.assignee)
+            else:
+                yield ('topic', topic)
+
+
+def parse_subscription(params, role=None):
+    """
+    Build a Subscription from ?topics=a,b, ?build=1,2 and ?assignee=<name>,
+    defaulting the topics from the user's role. Returns (subscription, error).
+    """
+    topics = ROLE_TOPICS.get(role, ALL_TOPICS)
+    if params.get('topics'):
+        topics = frozenset(topic.strip() for topic in params['topics'].split(',') if topic.strip())
+        unknown = topics - ALL_TOPICS
+        if unknown:
+            return None, f"Unknown topics: {', '.join(sorted(unknown))}; choose from {', '.join(TOPICS)}"
+    builds = None
+    if params.get('build'):
+        try:
+            builds = {int(build_id) for build_id in params['build'].split(',')}
+        except ValueError:
+            return None, "'build' must be a comma-separated list of ids"
+    return Subscription(topics, builds, params.get('assignee')), None
+
+
+class SubscriptionIndex:
+    """
+    SSE clients filed by (topic), (topic, build id) and (topic, assignee), so
+    a broadcast looks up only the clients interested in that event instead of
+    scanning every connection.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = defaultdict(set)
+        self.subscriptions = {}
+
+    def add(self, client, subscription):
+        with self.lock:
+            self.subscriptions[client] = subscription
+            for key in subscription.keys():
+                self.index[key].add(client)
+
+    def remove(self, client):
+        with self.lock:
+            subscription = self.subscriptions.pop(client, None)
+            if subscription is None:
+                return
+            for key in subscription.keys():
+                clients = self.index.get(key)
+                if clients is not None:
+                    clients.discard(client)
+                    if not clients:
+                        del self.index[key]
+
+    def match(self, topics, build_id=None, assignees=()):
+        """
+        Clients interested in any of topics for this build, each mapped to the
+        set of those topics it matched, so a client subscribed to several of a
+        change's topics is found (and messaged) once.
+        """
+        names = [assignee_key(name) for name in assignees if name]
+        with self.lock:
+            matched = defaultdict(set)
+            for topic in topics:
+                keys = [('topic', topic), ('build', topic, build_id)]
+                keys.extend(('assignee', topic, name) for name in names)
+                for key in keys:
+                    for client in self.index.get(key, ()):
+                        matched[client].add(topic)
+            return matched
+
+    def __len__(self):
+        return len(self.subscriptions)
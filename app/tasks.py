@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_local_queue = []  # (name, payload) of process-local tasks waiting for this process's workers
+_local_lock = threading.Lock()
+_wakeup = threading.Event()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def task(name, batch=False, local=False):
+    """
+    Register a handler. Plain handlers get one payload; batch handlers get the
+    list of payloads for every claimed task with this name. Local tasks have
+    effects only inside this process (e.g. writing to its SSE connections), so
+    they skip the shared table: they're queued in memory after commit and run
+    once, by this process's workers, never by run_tasks or another worker.
+    """
+    def decorator(func):
+        _registry[name] = (func, batch, local)
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, max_attempts=5):
+    # The row commits with the caller's transaction; workers are woken only after commit
+    if name in _registry and _registry[name][2]:
+        transaction.on_commit(lambda: _enqueue_local(name, payload or {}))
+        return
+    Task.objects.create(name=name, payload=payload or {}, max_attempts=max_attempts)
+    transaction.on_commit(wake_workers)
+
+
+def _enqueue_local(name, payload):
+    with _local_lock:
+        _local_queue.append((name, payload))
+    wake_workers()
+
+
+def local_task_names():
+    return [name for name, (_, _, local) in _registry.items() if local]
+
+
+def wake_workers():
+    ensure_workers()
+    _wakeup.set()
+
+
+def ensure_workers():
+    with _workers_lock:
+        _workers[:] = [worker for worker in _workers if worker.is_alive()]
+        for _ in range(settings.TASK_WORKERS - len(_workers)):
+            worker = threading.Thread(target=_worker_loop, name='task-worker', daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def _worker_loop():
+    while True:
+        try:
+            processed = run_pending()
+        except Exception:
+            logger.exception("Task worker iteration failed")
+            processed = 0
+        finally:
+            close_old_connections()
+        if not processed:
+            _wakeup.wait(settings.TASK_POLL_INTERVAL)
+            _wakeup.clear()
+
+
+def claim(batch_size):
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.TASK_LOCK_TIMEOUT)
+    ids = list(
+        Task.objects
+        .filter(Q(status=Task.PENDING, run_after__lte=now) | Q(status=Task.RUNNING, locked_at__lt=stale))
+        .exclude(name__in=local_task_names())
+        .order_by('run_after')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    # Conditional UPDATE so two workers never claim the same row
+    Task.objects.filter(
+        Q(status=Task.PENDING) | Q(status=Task.RUNNING, locked_at__lt=stale), id__in=ids
+    ).update(status=Task.RUNNING, locked_by=token, locked_at=now)
+    return list(Task.objects.filter(locked_by=token, status=Task.RUNNING))
+
+
+def run_local():
+    with _local_lock:
+        queued = _local_queue[:]
+        _local_queue.clear()
+    by_name = {}
+    for name, payload in queued:
+        by_name.setdefault(name, []).append(payload)
+    for name, payloads in by_name.items():
+        func, batch, _ = _registry[name]
+        # Not retried: these effects are best effort, like the connections they reach
+        try:
+            if batch:
+                func(payloads)
+            else:
+                for payload in payloads:
+                    func(payload)
+        except Exception:
+            logger.exception("Local task %s failed", name)
+    return len(queued)
+
+
+def run_pending(batch_size=None):
+    local = run_local()
+    tasks = claim(batch_size or settings.TASK_BATCH_SIZE)
+    by_name = {}
+    for claimed in tasks:
+        by_name.setdefault(claimed.name, []).append(claimed)
+
+    for name, group in by_name.items():
+        if name not in _registry:
+            _finish(group, f"No handler registered for task '{name}'", retry=False)
+            continue
+        func, batch, _ = _registry[name]
+        if batch:
+            _execute(group, lambda: func([claimed.payload for claimed in group]))
+        else:
+            for claimed in group:
+                _execute([claimed], lambda: func(claimed.payload))
+    return local + len(tasks)
+
+
+def _execute(group, call):
+    try:
+        call()
+    except Exception as e:
+        logger.exception("Task %s failed", group[0].name)
+        _finish(group, repr(e), retry=True)
+    else:
+        Task.objects.filter(id__in=[claimed.id for claimed in group]).delete()
+
+
+def _finish(group, error, retry):
+    for claimed in group:
+        claimed.attempts += 1
+        claimed.last_error = error
+        claimed.locked_by = None
+        claimed.locked_at = None
+        if retry and claimed.attempts < claimed.max_attempts:
+            claimed.status = Task.PENDING
+            # Exponential backoff: 2s, 4s, 8s, ...
+            claimed.run_after = timezone.now() + timedelta(seconds=2 ** claimed.attempts)
+        else:
+            claimed.status = Task.FAILED
+    Task.objects.bulk_update(group, ['attempts', 'last_error', 'locked_by', 'locked_at', 'status', 'run_after'])
+
+
+def drain(timeout=None):
+    # Run tasks on the calling thread until the queue is empty (or timeout seconds pass)
+    deadline = time.monotonic() + timeout if timeout else None
+    total = 0
+    while deadline is None or time.monotonic() < deadline:
+        processed = run_pending()
+        if not processed:
+            break
+        total += processed
+    return total
@@ -1,3 +1,404 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .archive import ARCHIVE_DB, ArchiveConflict, archive_batch, archive_shipped_builds
+from .benchmarks import parse_duration, parse_number, parse_triplet
+from .idempotency import idempotent
+from .importer import import_builds, read_rows
+from .models import Build, BuildSchedule, Component, CustomUser, IdempotencyKey, Payment, SnapshotBuild, StageSnapshot, StatusLog, Task
+from .subscriptions import Subscription
+from .tasks import claim, drain, enqueue
+from .trends import start_of_day, take_snapshots
+from .views import broadcast_sse_update, sse_subscriptions
+
+
+def make_build(pk, **fields):
+    values = dict(
+        id=pk, customerName=f"Customer {pk}", mobileNumber="9999900000", buildType="Normal",
+        deliveryType="Shipment", location="Chennai", deadline=datetime.date(2026, 11, 1),
+        orderDate=datetime.date(2026, 10, 1), enquiryId=f"E{pk}", paymentDone=100,
+        totalAmount=1000, balancePayment=900, adminName="admin",
+    )
+    values.update(fields)
+    return Build.objects.create(**values)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=0)
+class BuildIfMatchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(email="sales@example.com", password="x", role="Sales Team"))
+        self.build = make_build(1)
+
+    def test_weak_etag_from_compressed_get_is_accepted_by_if_match(self):
+        response = self.client.get('/api/builds/1/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+
+        response = self.client.post('/api/builds/1/', {'trackingNumber': 'T1'}, format='json', HTTP_IF_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.build.refresh_from_db()
+        self.assertEqual(self.build.trackingNumber, 'T1')
+
+    def test_stale_if_match_is_rejected(self):
+        etag = self.client.get('/api/builds/1/')['ETag']
+        self.client.post('/api/builds/1/', {'trackingNumber': 'T1'}, format='json', HTTP_IF_MATCH=etag)
+
+        response = self.client.post('/api/builds/1/', {'trackingNumber': 'T2'}, format='json', HTTP_IF_MATCH=f'W/{etag}')
+        self.assertEqual(response.status_code, 412)
+
+    def test_stage_update_keeps_concurrent_edit_and_bumps_version(self):
+        etag = self.client.get('/api/builds/1/')['ETag']
+        stale = Build.objects.get(pk=1)
+        self.client.post('/api/builds/1/', {'trackingNumber': 'SALES'}, format='json', HTTP_IF_MATCH=etag)
+        edited_etag = self.client.get('/api/builds/1/')['ETag']
+
+        self.client.post('/api/status-logs/1', {'stage': 'Build Started', 'user': 'tl'}, format='json')
+        stale.location = 'Bangalore'
+        stale.save(update_fields=['location'])
+
+        self.build.refresh_from_db()
+        self.assertEqual(self.build.trackingNumber, 'SALES')
+        self.assertEqual(self.build.currentStage, 'Build Started')
+        self.assertEqual(self.build.version, 4)
+        response = self.client.post('/api/builds/1/', {'trackingNumber': 'X'}, format='json', HTTP_IF_MATCH=edited_etag)
+        self.assertEqual(response.status_code, 412)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=0)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(email="tl@example.com", password="x", role="Supervisor"))
+        make_build(1)
+
+    def test_compressed_timeline_revalidates_with_weak_etag(self):
+        response = self.client.get('/api/builds/1/timeline', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+
+        response = self.client.get('/api/builds/1/timeline', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+
+class RecordingClient:
+    def __init__(self):
+        self.frames = []
+
+    def write(self, message):
+        self.frames.append(message)
+
+    def flush(self):
+        pass
+
+
+class BroadcastTests(SimpleTestCase):
+    def subscribe(self, subscription):
+        client = RecordingClient()
+        sse_subscriptions.add(client, subscription)
+        self.addCleanup(sse_subscriptions.remove, client)
+        return client
+
+    def test_one_frame_per_client_listing_the_matched_topics(self):
+        everything = self.subscribe(Subscription(frozenset({'builds', 'stages', 'payments'})))
+        followed = self.subscribe(Subscription(frozenset({'stages', 'components'}), builds={7}))
+        other = self.subscribe(Subscription(frozenset({'stages'}), builds={8}))
+
+        broadcast_sse_update({'id': 7, 'builder': 'Asha'}, ('builds', 'stages', 'components'))
+
+        self.assertEqual(len(everything.frames), 1)
+        self.assertEqual(json.loads(everything.frames[0][len(b'data: '):])['topics'], ['builds', 'stages'])
+        self.assertEqual(len(followed.frames), 1)
+        self.assertEqual(json.loads(followed.frames[0][len(b'data: '):])['topics'], ['components', 'stages'])
+        self.assertEqual(other.frames, [])
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@idempotent('test_failing')
+def failing_view(request):
+    raise RuntimeError("boom")
+
+
+class IdempotencyClaimTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.body = {'id': 1, 'customerName': 'C', 'mobileNumber': '9999900000', 'buildType': 'Normal',
+                     'deliveryType': 'Shipment', 'location': 'Chennai', 'deadline': '2026-11-01',
+                     'orderDate': '2026-10-01', 'enquiryId': 'E1', 'totalAmount': 1000, 'paymentDone': 0,
+                     'balancePayment': 1000, 'adminName': 'admin', 'components': []}
+
+    def first_request_never_finished(self, seconds_ago):
+        IdempotencyKey.objects.all().delete()
+        response = self.client.post('/api/builds/', self.body, format='json', HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual(response.status_code, 201)
+        Build.objects.all().delete()
+        IdempotencyKey.objects.update(status_code=None, response=None, claimed_at=timezone.now() - timedelta(seconds=seconds_ago))
+
+    def test_retry_waits_for_a_recent_claim(self):
+        self.first_request_never_finished(5)
+        response = self.client.post('/api/builds/', self.body, format='json', HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual(response.status_code, 409)
+
+    @override_settings(IDEMPOTENCY_CLAIM_TIMEOUT=60)
+    def test_retry_takes_over_a_stale_claim(self):
+        self.first_request_never_finished(120)
+        response = self.client.post('/api/builds/', self.body, format='json', HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Build.objects.filter(pk=1).exists())
+
+        replayed = self.client.post('/api/builds/', self.body, format='json', HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+
+    def test_claim_is_released_when_the_view_raises(self):
+        request = APIRequestFactory().post('/failing', {}, format='json', HTTP_IDEMPOTENCY_KEY='k2')
+        with self.assertRaises(RuntimeError):
+            failing_view(request)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class ScheduleRefreshTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(email="tl@example.com", password="x", role="Supervisor"))
+        self.build = make_build(1)
+        self.component = Component.objects.create(build=self.build, price=100, name="GPU", eta=datetime.date(2026, 10, 25))
+        self.assertEqual(BuildSchedule.objects.get(pk=1).partsReadyBy, datetime.date(2026, 10, 25))
+
+    def test_deleting_a_component_refreshes_the_schedule(self):
+        response = self.client.delete(f'/api/components/{self.component.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(BuildSchedule.objects.get(pk=1).partsReadyBy)
+
+    def test_emptying_the_component_list_refreshes_the_schedule(self):
+        response = self.client.post('/api/builds/1/', {'components': []}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(BuildSchedule.objects.get(pk=1).partsReadyBy)
+
+
+class PaymentTotalsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user(email="accounts@example.com", password="x", role="Accounts Team"))
+
+    def test_build_update_cannot_change_payment_totals(self):
+        make_build(1)
+        response = self.client.post('/api/builds/1/', {'paymentDone': 1000, 'balancePayment': 0, 'trackingNumber': 'T1'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        build = Build.objects.get(pk=1)
+        self.assertEqual((build.paymentDone, build.balancePayment, build.trackingNumber), (100, 900, 'T1'))
+
+    def test_changing_the_total_recomputes_the_balance(self):
+        make_build(1)
+        response = self.client.post('/api/builds/1/', {'totalAmount': 2000, 'balancePayment': 1900}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['balancePayment'], '1900.00')
+        build = Build.objects.get(pk=1)
+        self.assertEqual((build.totalAmount, build.paymentDone, build.balancePayment), (2000, 100, 1900))
+
+    def test_created_build_opens_its_ledger_with_the_amount_paid(self):
+        response = self.client.post('/api/builds/', {
+            'id': 2, 'customerName': 'C', 'mobileNumber': '9999900000', 'buildType': 'Normal',
+            'deliveryType': 'Shipment', 'location': 'Chennai', 'deadline': '2026-11-01', 'orderDate': '2026-10-01',
+            'enquiryId': 'E2', 'totalAmount': 1000, 'paymentDone': 250, 'balancePayment': 750, 'adminName': 'admin',
+            'components': [],
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(Payment.objects.filter(build_id=2).values_list('amount', 'paidOn')), [(250, datetime.date(2026, 10, 1))])
+
+
+class BuildImportTests(TestCase):
+    def ndjson(self):
+        rows = []
+        for pk in range(1, 6):
+            row = dict(
+                id=pk, customerName=f"Customer {pk}", mobileNumber="9999900000", buildType="Normal",
+                deliveryType="Shipment", location="Chennai", deadline="2026-11-01", orderDate="2026-10-01",
+                enquiryId=f"E{pk}", paymentDone=100, totalAmount=1000, balancePayment=900, adminName="admin",
+                components=[{'name': "GPU", 'price': 100, 'serialNumber': f"S{pk}"}],
+            )
+            rows.append(json.dumps(row))
+        rows[3] = '{"id": 4,'
+        return '\n'.join(rows) + '\n'
+
+    def test_interrupted_import_resumes_after_the_last_committed_row(self):
+        class Interrupted(Exception):
+            pass
+
+        committed = []
+
+        def stop_after_first_chunk(report):
+            committed.append(dict(report))
+            raise Interrupted
+
+        with self.assertRaises(Interrupted):
+            import_builds(read_rows(io.StringIO(self.ndjson()), 'ndjson'), chunk_size=2, on_chunk=stop_after_first_chunk)
+        self.assertEqual(committed[0]['lastRow'], 2)
+        self.assertEqual(sorted(Build.objects.values_list('id', flat=True)), [1, 2])
+
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user(email="tl@example.com", password="x", role="Supervisor"))
+        upload = SimpleUploadedFile("builds.ndjson", self.ndjson().encode())
+        response = client.post(f"/api/builds/import/?start_after={committed[0]['lastRow']}&chunk_size=2", {'file': upload})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['imported'], response.data['components'], response.data['failed']), (2, 2, 1))
+        self.assertEqual(response.data['errors'][0]['row'], 4)
+        self.assertEqual(response.data['lastRow'], 5)
+        self.assertEqual(sorted(Build.objects.values_list('id', flat=True)), [1, 2, 3, 5])
+        self.assertEqual(Component.objects.count(), 4)
+        self.assertEqual(Payment.objects.filter(build_id=5).get().amount, 100)
+
+
+class ArchiveTests(TestCase):
+    databases = {'default', ARCHIVE_DB}
+
+    def shipped(self, pk, name, serial):
+        build = make_build(pk, customerName=name, currentStage='Shipped', deadline=datetime.date(2020, 1, 1))
+        Component.objects.create(build=build, price=100, name="GPU", serialNumber=serial)
+        return build
+
+    def test_reused_build_id_stops_the_archive_run(self):
+        self.shipped(900001, "FIRST", "S1")
+        self.assertEqual(archive_shipped_builds(30), 1)
+        self.shipped(900001, "SECOND", "S2")
+
+        with self.assertRaises(ArchiveConflict):
+            archive_shipped_builds(30)
+
+        self.assertEqual(Build.objects.get(pk=900001).customerName, "SECOND")
+        archived = Build.objects.using(ARCHIVE_DB).get(pk=900001)
+        self.assertEqual(archived.customerName, "FIRST")
+        self.assertEqual(list(Component.objects.using(ARCHIVE_DB).values_list('serialNumber', flat=True)), ["S1"])
+
+    def test_interrupted_copy_is_archived_on_the_next_run(self):
+        build = self.shipped(900003, "THIRD", "S3")
+        build.refresh_from_db()
+        Build.objects.using(ARCHIVE_DB).bulk_create([build])
+
+        self.assertEqual(archive_batch([900003]), {900003})
+        self.assertFalse(Build.objects.filter(pk=900003).exists())
+        self.assertEqual(Component.objects.using(ARCHIVE_DB).get(build_id=900003).serialNumber, "S3")
+
+
+class LocalTaskTests(TestCase):
+    def test_broadcast_stays_in_the_process_that_queued_it(self):
+        make_build(1)
+        client = RecordingClient()
+        sse_subscriptions.add(client, Subscription(frozenset({'stages'})))
+        self.addCleanup(sse_subscriptions.remove, client)
+
+        with mock.patch('app.tasks.wake_workers'), self.captureOnCommitCallbacks(execute=True):
+            enqueue('broadcast_build', {'build_id': 1, 'topic': 'stages'})
+        self.assertFalse(Task.objects.exists())
+
+        # A row left from before broadcasts were local is never claimed by another process
+        Task.objects.create(name='broadcast_build', payload={'build_id': 1})
+        self.assertEqual(claim(10), [])
+
+        drain()
+        self.assertEqual(len(client.frames), 1)
+
+
+class BenchmarkParserTests(SimpleTestCase):
+    def test_triplet_separators_are_not_signs_or_thousands(self):
+        for text in ('35-72-88', '35,72,88', '35 - 72 - 88', '35/72/88', 'Idle 35 Load 72 Stress 88'):
+            self.assertEqual(parse_triplet(text), (35.0, 72.0, 88.0), text)
+        self.assertEqual(parse_triplet('Idle -5 Load 72'), (-5.0, 72.0, None))
+        self.assertEqual(parse_triplet(''), (None, None, None))
+
+    def test_number_keeps_thousands_grouping(self):
+        self.assertEqual(parse_number('15,234 pts'), 15234.0)
+        self.assertEqual(parse_number('1,234.5'), 1234.5)
+        self.assertEqual(parse_number('-3 C'), -3.0)
+        self.assertEqual(parse_number('avg 144 fps'), 144.0)
+        self.assertIsNone(parse_number('n/a'))
+
+    def test_duration_formats(self):
+        self.assertEqual(parse_duration('2:35'), 155.0)
+        self.assertEqual(parse_duration('1:02:35'), 3755.0)
+        self.assertEqual(parse_duration('2m 35s'), 155.0)
+        self.assertEqual(parse_duration('155'), 155.0)
+
+
+class SerialLookupTests(TestCase):
+    def test_serial_with_a_slash_is_found(self):
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user(email="tl@example.com", password="x", role="Supervisor"))
+        Component.objects.create(build=make_build(1), price=100, name="GPU", serialNumber="AB/12-X")
+
+        for serial in ('AB/12-X', 'AB12X'):
+            response = client.get(f'/api/components/by-serial/{serial}')
+            self.assertEqual(response.status_code, 200, serial)
+            self.assertEqual(response.data[0]['serialNumber'], 'AB/12-X')
+
+
+class SnapshotReplayTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+
+    def day(self, days_ago):
+        return self.today - timedelta(days=days_ago)
+
+    def log(self, build, status, days_ago):
+        log = StatusLog.objects.create(build=build, status=status, updated_by="tl")
+        StatusLog.objects.filter(pk=log.pk).update(timestamp=start_of_day(self.day(days_ago)) + timedelta(hours=12))
+
+    def counts(self, days_ago):
+        return {
+            (dimension, key): count
+            for dimension, key, count in StageSnapshot.objects.filter(day=self.day(days_ago)).values_list('dimension', 'key', 'count')
+        }
+
+    def rebuilt(self, days_ago):
+        StageSnapshot.objects.all().delete()
+        SnapshotBuild.objects.all().delete()
+        take_snapshots(self.day(days_ago))
+        return self.counts(days_ago)
+
+    def test_late_entry_is_counted_once_from_the_first_replayed_day(self):
+        make_build(1, orderDate=self.day(10))
+        take_snapshots(self.day(6))
+        late = make_build(2, orderDate=self.day(9), location="Mumbai")
+        self.log(late, 'Build Started', 4)
+
+        take_snapshots(self.day(5))
+        self.assertEqual(self.counts(5)[('stage', 'Components Pending')], 2)
+        take_snapshots(self.day(1))
+        self.assertEqual(self.counts(1)[('stage', 'Build Started')], 1)
+        self.assertEqual(self.counts(1)[('location', 'Mumbai')], 1)
+        self.assertEqual(self.counts(1), self.rebuilt(1))
+
+    def test_rollback_from_shipped_reopens_the_build(self):
+        build = make_build(1, orderDate=self.day(10), builder="Ravi", builderAssignedDate=start_of_day(self.day(9)))
+        self.log(build, 'Shipped', 8)
+        take_snapshots(self.day(6))
+        self.assertEqual(self.counts(6), {('stage', 'Shipped'): 1})
+
+        self.log(build, 'Build Started', 4)
+        take_snapshots(self.day(1))
+        self.assertEqual(self.counts(1), {('stage', 'Build Started'): 1, ('location', 'Chennai'): 1, ('builder', 'Ravi'): 1})
+        self.assertEqual(self.counts(1), self.rebuilt(1))
+
+    def test_deleted_build_is_taken_off_the_carried_over_counts(self):
+        make_build(1, orderDate=self.day(10))
+        deleted = make_build(2, orderDate=self.day(10), location="Mumbai", tester="Anu", testerAssignedDate=start_of_day(self.day(9)))
+        self.log(deleted, 'Testing', 8)
+        take_snapshots(self.day(6))
+        self.assertEqual(self.counts(6)[('tester', 'Anu')], 1)
+
+        deleted.delete()
+        take_snapshots(self.day(1))
+        self.assertEqual(self.counts(1)[('location', 'Mumbai')], 1)
+        take_snapshots(self.today)
+        self.assertEqual(self.counts(0), {('stage', 'Components Pending'): 1, ('location', 'Chennai'): 1})
+        self.assertFalse(SnapshotBuild.objects.filter(build_id=2).exists())
+        self.assertEqual(self.counts(0), self.rebuilt(0))
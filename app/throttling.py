@@ -0,0 +1,88 @@
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import SimpleRateThrottle
+
+DATA_VERSION_KEY = 'data-version'
+
+
+def bump_data_version():
+    # Called on writes that change what pollers see
+    try:
+        cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        cache.set(DATA_VERSION_KEY, 1, None)
+
+
+def data_version():
+    return cache.get_or_set(DATA_VERSION_KEY, 0, None)
+
+
+class PollingThrottle(SimpleRateThrottle):
+    """
+    Per-client, per-endpoint rate limit (rates in DEFAULT_THROTTLE_RATES),
+    keyed by user id when authenticated, otherwise by client IP.
+    """
+
+    def get_cache_key(self, request, view):
+        user = getattr(request, 'user', None)
+        ident = user.pk if user is not None and user.is_authenticated else self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+THROTTLES = {}
+
+
+def throttle_for(scope):
+    THROTTLES[scope] = type(f"{scope.title().replace('_', '')}Throttle", (PollingThrottle,), {'scope': scope})
+    return THROTTLES[scope]
+
+
+BuildsThrottle = throttle_for('builds')
+StatusLogsThrottle = throttle_for('status_logs')
+ChecklistsThrottle = throttle_for('checklists')
+TrackingThrottle = throttle_for('tracking')
+
+
+def poll_interval(request, scope):
+    """
+    Suggested seconds until the client's next poll: doubles (up to
+    POLL_INTERVAL_MAX) while the data version is unchanged since this client's
+    last poll, and drops back to POLL_INTERVAL_MIN as soon as anything changes.
+    """
+    key = f"poll-interval:{THROTTLES[scope]().get_cache_key(request, None)}"
+    version = data_version()
+    last_version, interval = cache.get(key, (None, settings.POLL_INTERVAL_MIN))
+    if last_version == version:
+        interval = min(interval * 2, settings.POLL_INTERVAL_MAX)
+    else:
+        interval = settings.POLL_INTERVAL_MIN
+    cache.set(key, (version, interval), settings.POLL_INTERVAL_MAX * 2)
+    return interval
+
+
+def poll_hints(scope):
+    # Adds X-Poll-Interval to successful GET responses of sync and async views
+    def add_hint(request, response):
+        # Async views that fall through to a sync view already carry the hint
+        if request.method == 'GET' and response.status_code == 200 and 'X-Poll-Interval' not in response:
+            response['X-Poll-Interval'] = str(poll_interval(request, scope))
+        return response
+
+    def decorator(view):
+        if asyncio.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapped(request, *args, **kwargs):
+                response = await view(request, *args, **kwargs)
+                # Cache only, no database: keep it off the thread the async ORM queues on
+                return await sync_to_async(add_hint, thread_sensitive=False)(request, response)
+        else:
+            @functools.wraps(view)
+            def wrapped(request, *args, **kwargs):
+                return add_hint(request, view(request, *args, **kwargs))
+        return wrapped
+    return decorator
@@ -0,0 +1,201 @@
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from .models import Build, SnapshotBuild, StageSnapshot, StatusLog
+
+INITIAL_STAGE = 'Components Pending'
+CLOSED_STAGE = 'Shipped'
+ROLE_FIELDS = {'builder': 'builderAssignedDate', 'tester': 'testerAssignedDate'}
+BUILD_FIELDS = ['id', 'orderDate', 'location', 'builder', 'tester', 'builderAssignedDate', 'testerAssignedDate']
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def local_day(value):
+    return timezone.localtime(value).date() if value else None
+
+
+class BoardState:
+    """
+    Running end-of-day counts: builds per stage, and open (not shipped)
+    builds per location, builder and tester. Builders and testers count from
+    their assignment date, attributed to the name currently on the build.
+    entries holds what each involved build counts for, so a move takes off
+    exactly what was added before.
+    """
+
+    def __init__(self, counts=None, entries=None):
+        self.counts = {dimension: Counter() for dimension in StageSnapshot.DIMENSIONS}
+        for dimension, key, count in counts or ():
+            self.counts[dimension][key] = count
+        self.entries = dict(entries or {})
+
+    def assigned(self, build, role, day):
+        return bool(build[role]) and local_day(build[ROLE_FIELDS[role]]) is not None \
+            and local_day(build[ROLE_FIELDS[role]]) <= day
+
+    def contribution(self, build, stage, day):
+        entry = {'stage': stage, 'location': None, 'builder': None, 'tester': None}
+        if stage != CLOSED_STAGE:
+            entry['location'] = build['location']
+            for role in ROLE_FIELDS:
+                if self.assigned(build, role, day):
+                    entry[role] = build[role]
+        return entry
+
+    def count(self, entry, sign):
+        for dimension, key in entry.items():
+            if key is not None:
+                self.counts[dimension][key] += sign
+
+    def set(self, build_id, entry):
+        if build_id in self.entries:
+            self.count(self.entries[build_id], -1)
+        self.entries[build_id] = entry
+        self.count(entry, 1)
+
+    def stage(self, build_id):
+        return self.entries[build_id]['stage']
+
+    def add_build(self, build, day, stage=INITIAL_STAGE):
+        self.set(build['id'], self.contribution(build, stage, day))
+
+    def move(self, build, stage, day):
+        self.set(build['id'], self.contribution(build, stage, day))
+
+    def assign(self, build, role):
+        self.set(build['id'], dict(self.entries[build['id']], **{role: build[role]}))
+
+    def remove(self, entry):
+        self.count(entry, -1)
+
+    def rows(self, day):
+        return [
+            StageSnapshot(day=day, dimension=dimension, key=key, count=count)
+            for dimension, counter in self.counts.items()
+            for key, count in counter.items() if count > 0
+        ]
+
+
+def take_snapshots(until=None):
+    """
+    Write one snapshot per day from the day after the latest stored snapshot
+    through until (default yesterday). Only logs since the latest snapshot are
+    replayed, starting from its stored counts; the first run replays the whole
+    log once. A build not counted yet is added on its order date, or on the
+    first day replayed when that has passed (e.g. entered late with an old
+    order date), in the stage its earlier logs left it in. A build deleted
+    since is taken off from its deletion day with what it last counted for.
+    Returns the number of days written.
+    """
+    until = until or timezone.localdate() - timedelta(days=1)
+    last_day = StageSnapshot.objects.aggregate(last=Max('day'))['last']
+    if last_day is None:
+        first_order = Build.objects.aggregate(first=Min('orderDate'))['first']
+        if first_order is None:
+            return 0
+        last_day = first_order - timedelta(days=1)
+        state = BoardState()
+    else:
+        state = BoardState(StageSnapshot.objects.filter(day=last_day).values_list('dimension', 'key', 'count'))
+    if last_day >= until:
+        return 0
+
+    first_day = last_day + timedelta(days=1)
+    window = (start_of_day(first_day), start_of_day(until + timedelta(days=1)))
+    logs = list(
+        StatusLog.objects
+        .filter(timestamp__gte=window[0], timestamp__lt=window[1])
+        .order_by('timestamp', 'id')
+        .values_list('build_id', 'status', 'timestamp')
+    )
+    touched = {build_id for build_id, _, _ in logs}
+    # Entries after last_day belong to snapshots being rewritten, so those builds count as new again
+    counted = SnapshotBuild.objects.filter(day__lte=last_day)
+    live = counted.filter(deleted_on__isnull=True)
+    builds = {
+        build['id']: build
+        for build in Build.objects.filter(
+            Q(id__in=touched)
+            | (~Q(id__in=live.values('build_id')) & Q(orderDate__lte=until))
+            | Q(builderAssignedDate__gte=window[0], builderAssignedDate__lt=window[1])
+            | Q(testerAssignedDate__gte=window[0], testerAssignedDate__lt=window[1])
+        ).values(*BUILD_FIELDS)
+    }
+    stored = {entry.build_id: entry for entry in live.filter(build_id__in=builds)}
+    state.entries = {build_id: entry.contribution() for build_id, entry in stored.items()}
+    pending = set(builds) - set(stored)
+    removed = list(counted.filter(deleted_on__isnull=False, deleted_on__lte=until))
+
+    # Stage of each pending build at the end of last_day: the status of its latest earlier log
+    stages = dict(
+        StatusLog.objects
+        .filter(build_id__in=pending, timestamp__lt=window[0])
+        .order_by('build_id', 'timestamp', 'id')
+        .values_list('build_id', 'status')
+    )
+
+    # Day each pending build joins the board: its order date (not before first_day) or an earlier first log
+    joins = {build_id: max(builds[build_id]['orderDate'], first_day) for build_id in pending}
+    for build_id, _, timestamp in logs:
+        if build_id in joins:
+            joins[build_id] = min(joins[build_id], local_day(timestamp))
+
+    events = defaultdict(lambda: {'removed': [], 'new': [], 'assign': [], 'logs': []})
+    for entry in removed:
+        events[max(entry.deleted_on, first_day)]['removed'].append(entry)
+    for build in builds.values():
+        joined_on = joins.get(build['id'])
+        if joined_on is not None and joined_on <= until:
+            events[joined_on]['new'].append(build)
+        for role, date_field in ROLE_FIELDS.items():
+            assigned_on = local_day(build[date_field])
+            if not (build[role] and assigned_on and first_day <= assigned_on <= until):
+                continue
+            # Assignments up to the join day are counted when the build is added
+            if build['id'] not in pending or (joined_on is not None and assigned_on > joined_on):
+                events[assigned_on]['assign'].append((build, role))
+    for build_id, stage, timestamp in logs:
+        events[local_day(timestamp)]['logs'].append((build_id, stage))
+
+    snapshots = []
+    added = {}
+    day = first_day
+    while day <= until:
+        today = events.get(day)
+        if today:
+            for entry in today['removed']:
+                state.remove(entry.contribution())
+            for build in today['new']:
+                added[build['id']] = day
+                state.add_build(build, day, stages.get(build['id'], INITIAL_STAGE))
+            for build, role in today['assign']:
+                if state.stage(build['id']) != CLOSED_STAGE:
+                    state.assign(build, role)
+            for build_id, stage in today['logs']:
+                if state.stage(build_id) != stage:
+                    state.move(builds[build_id], stage, day)
+        snapshots.extend(state.rows(day))
+        day += timedelta(days=1)
+
+    with transaction.atomic():
+        StageSnapshot.objects.filter(day__gt=last_day, day__lte=until).delete()
+        StageSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+        SnapshotBuild.objects.filter(Q(day__gt=last_day) | Q(pk__in=[entry.pk for entry in removed])).delete()
+        # Store what every involved build now counts for; skip any deleted meanwhile
+        SnapshotBuild.objects.filter(build_id__in=state.entries, deleted_on__isnull=True).delete()
+        existing = set(Build.objects.filter(id__in=state.entries).values_list('id', flat=True))
+        SnapshotBuild.objects.bulk_create(
+            [
+                SnapshotBuild(build_id=build_id, day=stored[build_id].day if build_id in stored else added[build_id], **entry)
+                for build_id, entry in state.entries.items() if build_id in existing
+            ],
+            batch_size=1000,
+        )
+    return (until - last_day).days
@@ -1,31 +1,54 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
 
+# Under ASGI the hot read endpoints are served by their async versions
+read_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
-    path('builds/', views.build_list_create, name='build-list'),
-    path('builds/<int:pk>/', views.build_detail, name='build-detail'),
+    path('builds/', read_views.build_list_create, name='build-list'),
+    path('builds/<int:pk>/', read_views.build_detail, name='build-detail'),
+    path('builds/import/', views.build_import, name='build-import'),
+    path('builds/at-risk', views.builds_at_risk, name='builds-at-risk'),
+    path('builds/<int:pk>/timeline', views.build_timeline, name='build-timeline'),
+    path('builds/<int:pk>/report', views.build_report, name='build-report'),
+    path('builds/<int:pk>/payments/', views.build_payments, name='build-payments'),
+    path('payments/receivables/', views.payments_receivables, name='payments-receivables'),
+    path('payments/collections/', views.payments_collections, name='payments-collections'),
+    path('assignments/suggest', views.suggest_assignee, name='suggest-assignee'),
+    path('stats/stage-trends/', views.stage_trends, name='stage-trends'),
 
     path('components/', views.component_list_create, name='component-list'),
     path('components/<int:pk>/', views.component_detail, name='component-detail'),
+    path('components/pending/', views.pending_components, name='component-pending'),
+    path('components/by-serial/', views.component_by_serial_bulk, name='component-by-serial-bulk'),
+    path('components/by-serial/<path:serial>', views.component_by_serial, name='component-by-serial'),
 
     path('status-logs/', views.status_log_list_create, name='status-log-list'),
     path('status-logs/<int:build_id>', views.update_build_stage, name='status-log-update'),
-    path('get-status-log/<int:build_id>', views.get_status_log, name='get-status-log'),
+    path('get-status-log/<int:build_id>', read_views.get_status_log, name='get-status-log'),
 
     path('checklists/', views.checklist_list_create, name='checklist-list'),
-    path('get-checklist/<int:build_id>', views.get_checklist, name='get-checklist'),
+    path('get-checklist/<int:build_id>', read_views.get_checklist, name='get-checklist'),
+    path('benchmarks/distribution/', views.benchmark_distribution, name='benchmark-distribution'),
+
+    path('track/<str:enquiry_id>/<str:mobile_number>', views.track_order, name='track-order'),
+
+    path('export/<str:table>', views.export_table, name='export-table'),
 
     path('invoice-statuses/', views.invoice_status_list_create, name='invoice-status-list'),
+    path('invoice-statuses/bulk/', views.invoice_status_bulk_upsert, name='invoice-status-bulk'),
+    path('invoice-statuses/pending/', views.builds_without_invoice, name='invoice-status-pending'),
     
     path('login/', views.login, name='login'),
     path('get-user-role/', views.get_user_role, name='get-user-role'),
     
     # SSE ROUTES
-    path('sse/builds/', views.sse_build_updates),
+    path('sse/builds/', read_views.sse_build_updates),
     # Access Token
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -1,39 +1,117 @@
+import hashlib
+import io
 import json
+import re
 import time
-from django.shortcuts import get_object_or_404
-from rest_framework.decorators import api_view, permission_classes
+from datetime import date, timedelta
+from itertools import chain
+from django.http import FileResponse, Http404, HttpResponse
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Build, Component, StatusLog, Checklist, InvoiceStatus
+from .models import Build, BuildSchedule, Component, StatusLog, Checklist, InvoiceStatus, BenchmarkResult, Payment, StageSnapshot, Task, normalize_serial
+from .tasks import enqueue, task
+from .subscriptions import SubscriptionIndex, parse_subscription
+from .throttling import (
+    BuildsThrottle, ChecklistsThrottle, StatusLogsThrottle, TrackingThrottle, bump_data_version, poll_hints
+)
+from .archive import ARCHIVE_DB, archive_available
+from .idempotency import idempotent
+from .scheduler import slack_days
+from .assignments import ROLES, assignment_index
+from .benchmarks import CPU_METRICS, GPU_METRICS, METRIC_FIELDS, component_kind, distribution
 from django.contrib.auth.models import User
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import authenticate
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
 from rest_framework_simplejwt.tokens import RefreshToken
 from .serializers import (
     BuildSerializer, ComponentSerializer, StatusLogSerializer,
-    ChecklistSerializer, InvoiceStatusSerializer
+    ChecklistSerializer, InvoiceStatusSerializer, SerialLookupSerializer, PaymentSerializer
 )
 from django.http import StreamingHttpResponse
-from threading import Lock
 from django.views.decorators.csrf import csrf_exempt
+from django.db import transaction
+from django.db.models import Count, Max, Min, Prefetch, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import parse_etags, quote_etag
 
 
-sse_subscribers = []
-subscriber_lock = Lock()
+def parse_fields_param(request, model):
+    # ?fields=id,status,timestamp -> validated concrete field names, or None for everything
+    raw = request.GET.get('fields')
+    if not raw:
+        return None, None
+    concrete = {field.name for field in model._meta.concrete_fields}
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in concrete]
+    if unknown:
+        return None, Response({"error": f"Unknown fields: {', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST)
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields, None
 
-def broadcast_sse_update(data):
-    message = f"data: {json.dumps(data)}\n\n"
-    with subscriber_lock:
-        dead_subscribers = []
-        for subscriber in sse_subscribers:
-            try:
-                subscriber.write(message.encode('utf-8'))
-                subscriber.flush()
-            except Exception as e:
-                print("SSE client dropped:", e)
-                dead_subscribers.append(subscriber)
-        for sub in dead_subscribers:
-            sse_subscribers.remove(sub)
+
+STAGE_ORDER = [stage for stage, _ in Build.STATUS_CHOICES]
+
+
+def include_archived(request):
+    requested = request.GET.get('include_archived', '').lower() in ('1', 'true', 'yes')
+    return requested and archive_available()
+
+def build_etag(build):
+    # Changes with every write to the build row, see Build.version
+    return quote_etag(f"{build.pk}-{build.version}")
+
+def etag_opaque(etag):
+    # CompressionMiddleware sends W/"..." for compressed bodies; clients echo whichever they got
+    return etag[2:] if etag.startswith('W/') else etag
+
+def etag_listed(etag, header):
+    # Weak comparison, as If-None-Match requires
+    return etag_opaque(etag) in {etag_opaque(tag) for tag in parse_etags(header)}
+
+sse_subscriptions = SubscriptionIndex()
+
+def broadcast_sse_update(data, topics=('builds',)):
+    # Only clients subscribed to these topics, this build or its builder/tester get the message:
+    # one frame each, listing the topics it matched under "topics"
+    clients = sse_subscriptions.match(topics, data.get('id'), (data.get('builder'), data.get('tester')))
+    messages = {}
+    for subscriber, matched in clients.items():
+        matched = tuple(sorted(matched))
+        if matched not in messages:
+            messages[matched] = f"data: {json.dumps({**data, 'topics': matched}, cls=DjangoJSONEncoder)}\n\n".encode('utf-8')
+        try:
+            subscriber.write(messages[matched])
+            subscriber.flush()
+        except Exception as e:
+            print("SSE client dropped:", e)
+            sse_subscriptions.remove(subscriber)
+
+def sse_subscription(request):
+    """
+    The stream's Subscription from its query string and, when a JWT is sent
+    (Authorization header, or ?token= since EventSource can't set headers),
+    the user's role. Returns (subscription, error response).
+    """
+    role = None
+    jwt = JWTAuthentication()
+    header = jwt.get_header(request)
+    raw_token = request.GET.get('token') or (jwt.get_raw_token(header) if header else None)
+    if raw_token:
+        try:
+            role = jwt.get_user(jwt.get_validated_token(raw_token)).role
+        except (AuthenticationFailed, InvalidToken) as e:
+            return None, HttpResponse(json.dumps(e.detail), status=e.status_code, content_type='application/json')
+    subscription, error = parse_subscription(request.GET, role)
+    if error:
+        return None, HttpResponse(json.dumps({"error": error}), status=400, content_type='application/json')
+    return subscription, None
 
 @csrf_exempt
 def sse_build_updates(request):
@@ -58,8 +136,7 @@ def sse_build_updates(request):
                 self.buffer.clear()
 
         client = Client()
-        with subscriber_lock:
-            sse_subscribers.append(client)
+        sse_subscriptions.add(client, subscription)
 
         try:
             while True:
@@ -68,16 +145,23 @@ def sse_build_updates(request):
                 time.sleep(10)
                 yield from client.flush()
         except GeneratorExit:
-            with subscriber_lock:
-                sse_subscribers.remove(client)
+            sse_subscriptions.remove(client)
 
+    subscription, error = sse_subscription(request)
+    if error:
+        return error
     return event_stream()
 
+@poll_hints('builds')
 @api_view(['GET', 'POST'])
 @permission_classes([AllowAny])
+@throttle_classes([BuildsThrottle])
+@idempotent('build_list_create')
 def build_list_create(request):
     if request.method == 'GET':
         builds = Build.objects.all().order_by('id')
+        if include_archived(request):
+            builds = chain(builds, Build.objects.using(ARCHIVE_DB).order_by('id'))
         serialized_builds = []
 
         # Define the correct order of stages
@@ -108,7 +192,7 @@ def build_list_create(request):
 
             if current_stage_idx >= stage_index("Build Completed"):
                 build_completed_log = (
-                    StatusLog.objects
+                    StatusLog.objects.using(build._state.db)
                     .filter(build=build, status="Build Completed", action="advance")
                     .order_by('-timestamp')
                     .first()
@@ -116,7 +200,7 @@ def build_list_create(request):
 
             if current_stage_idx >= stage_index("Test Completed"):
                 test_completed_log = (
-                    StatusLog.objects
+                    StatusLog.objects.using(build._state.db)
                     .filter(build=build, status="Test Completed", action="advance")
                     .order_by('-timestamp')
                     .first()
@@ -132,74 +216,147 @@ def build_list_create(request):
     
     elif request.method == 'POST':
         serializer = BuildSerializer(data=request.data)
-    if serializer.is_valid():
-            build = serializer.save()
-
-            # Build full enriched build data (like GET does)
-            stage_order = [
-                'Components Pending',
-                'Components Assigned',
-                'Build Started',
-                'Build Completed',
-                'Testing Started',
-                'Test Completed',
-                'Ready for Shipment',
-                'Shipped'
-            ]
-
-            def stage_index(stage):
-                try:
-                    return stage_order.index(build.currentStage)
-                except ValueError:
-                    return -1
+        if serializer.is_valid():
+            with transaction.atomic():
+                build = serializer.save()
+                # Push full build data to connected clients once the build is committed
+                enqueue('broadcast_build', {'build_id': build.id})
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            build_data = BuildSerializer(build).data
-            current_stage_idx = stage_index(build.currentStage)
 
-            build_completed_log = (
-                StatusLog.objects
-                .filter(build=build, status="Build Completed", action="advance")
-                .order_by('-timestamp')
-                .first()
-                if current_stage_idx >= stage_index("Build Completed")
-                else None
-            )
-
-            test_completed_log = (
-                StatusLog.objects
-                .filter(build=build, status="Test Completed", action="advance")
-                .order_by('-timestamp')
-                .first()
-                if current_stage_idx >= stage_index("Test Completed")
-                else None
-            )
+@task('broadcast_build', batch=True, local=True)
+def broadcast_builds(payloads):
+    # payload: {'build_id': ..., 'topic': one of subscriptions.TOPICS, default 'builds'}
+    topics = {}
+    for payload in payloads:
+        topics.setdefault(payload['build_id'], set()).add(payload.get('topic', 'builds'))
+    builds = Build.objects.filter(id__in=topics).prefetch_related('components')
+    for build in builds:
+        build_data = BuildSerializer(build).data
+        current_stage_idx = STAGE_ORDER.index(build.currentStage) if build.currentStage in STAGE_ORDER else -1
+        for stage, key in (('Build Completed', 'buildCompletedDate'), ('Test Completed', 'testCompletedDate')):
+            log = None
+            if current_stage_idx >= STAGE_ORDER.index(stage):
+                log = (
+                    StatusLog.objects
+                    .filter(build=build, status=stage, action="advance")
+                    .order_by('-timestamp')
+                    .first()
+                )
+            build_data[key] = log.timestamp if log else None
+        broadcast_sse_update(build_data, topics[build.id])
 
-            build_data["buildCompletedDate"] = build_completed_log.timestamp if build_completed_log else None
-            build_data["testCompletedDate"] = test_completed_log.timestamp if test_completed_log else None
 
-            # Push full build data to connected clients
-            broadcast_sse_update(build_data)
+@api_view(['GET'])
+def builds_at_risk(request):
+    try:
+        threshold = int(request.query_params.get('threshold', 0))
+        limit = int(request.query_params.get('limit', 50))
+    except ValueError:
+        return Response({"error": "'threshold' and 'limit' must be integers"}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+    today = timezone.localdate()
+    # slack < threshold  <=>  latestStart < today + threshold  OR  partsSlack < threshold; both are index range scans
+    schedules = (
+        BuildSchedule.objects
+        .select_related('build')
+        .filter(Q(latestStart__lt=today + timedelta(days=threshold)) | Q(partsSlack__lt=threshold))
+    )
+    at_risk = sorted(
+        ((slack_days(s.latestStart, s.partsSlack, today), s) for s in schedules),
+        key=lambda item: (item[0], item[1].build_id),
+    )[:max(limit, 0)]
+    return Response([
+        {
+            'id': schedule.build_id,
+            'customerName': schedule.build.customerName,
+            'enquiryId': schedule.build.enquiryId,
+            'currentStage': schedule.build.currentStage,
+            'deadline': schedule.build.deadline,
+            'partsReadyBy': schedule.partsReadyBy,
+            'latestStart': schedule.latestStart,
+            'slackDays': slack,
+        }
+        for slack, schedule in at_risk
+    ])
 
+@api_view(['GET'])
+def suggest_assignee(request):
+    role = request.query_params.get('role', 'builder')
+    if role not in ROLES:
+        return Response({"error": "'role' must be 'builder' or 'tester'"}, status=status.HTTP_400_BAD_REQUEST)
+    engineers = assignment_index.ranking(role)
+    return Response({
+        'role': role,
+        'suggested': engineers[0]['name'] if engineers else None,
+        'engineers': engineers,
+    })
+
+@api_view(['POST'])
+def build_import(request):
+    # The importer, reports, trends and export modules are imported on use, so
+    # a cold start that only serves the board doesn't load them
+    from .importer import DEFAULT_CHUNK_SIZE, import_builds, read_rows
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"error": "Upload a CSV or NDJSON file as 'file'"}, status=status.HTTP_400_BAD_REQUEST)
+    fmt = request.query_params.get('source_format') or ('csv' if upload.name.lower().endswith('.csv') else 'ndjson')
+    if fmt not in ('csv', 'ndjson'):
+        return Response({"error": "'source_format' must be 'csv' or 'ndjson'"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        start_after = int(request.query_params.get('start_after', 0))
+        chunk_size = int(request.query_params.get('chunk_size', DEFAULT_CHUNK_SIZE))
+    except ValueError:
+        return Response({"error": "'start_after' and 'chunk_size' must be integers"}, status=status.HTTP_400_BAD_REQUEST)
 
+    stream = io.TextIOWrapper(upload.file, encoding='utf-8', newline='')
+    report = import_builds(read_rows(stream, fmt), max(chunk_size, 1), start_after)
+    return Response(report, status=status.HTTP_200_OK)
 
+
+@poll_hints('builds')
 @api_view(['GET', 'POST', 'DELETE'])
+@throttle_classes([BuildsThrottle])
 def build_detail(request, pk):
     try:
         build = Build.objects.get(pk=pk)
     except Build.DoesNotExist:
-        return Response(status=status.HTTP_404_NOT_FOUND)
+        # Archived builds are read-only
+        build = None
+        if request.method == 'GET' and include_archived(request):
+            build = Build.objects.using(ARCHIVE_DB).filter(pk=pk).first()
+        if build is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
 
     if request.method == 'GET':
         serializer = BuildSerializer(build)
-        return Response(serializer.data)
+        response = Response(serializer.data)
+        response['ETag'] = build_etag(build)
+        return response
 
     elif request.method == 'POST':
-        serializer = BuildSerializer(build, data=request.data, partial=True)
+        # With If-Match the update only applies to the version the client last saw
+        expected_version = None
+        if_match = request.headers.get('If-Match', '')
+        if if_match and '*' not in parse_etags(if_match):
+            # The version identifies the row, not a byte representation, so W/ is ignored here
+            if not etag_listed(build_etag(build), if_match):
+                return Response({"error": "The build was changed by someone else; reload it and retry."},
+                                status=status.HTTP_412_PRECONDITION_FAILED)
+            expected_version = build.version
+        serializer = BuildSerializer(build, data=request.data, partial=True,
+                                     context={'request': request, 'expected_version': expected_version})
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
+            with transaction.atomic():
+                serializer.save()
+                enqueue('broadcast_build', {'build_id': build.id})
+                if 'components' in request.data:
+                    enqueue('broadcast_build', {'build_id': build.id, 'topic': 'components'})
+            response = Response(serializer.data)
+            response['ETag'] = build_etag(build)
+            return response
         print(serializer.errors)
         print(request.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -209,6 +366,229 @@ def build_detail(request, pk):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+@poll_hints('builds')
+@api_view(['GET'])
+@throttle_classes([BuildsThrottle])
+def build_timeline(request, pk):
+    # Everything the detail page shows in three queries: the build joined to its
+    # checklist and invoice status, then its components and its ordered logs
+    build = (
+        Build.objects
+        .select_related('checklist', 'invoice_status')
+        .prefetch_related('components', Prefetch('status_logs', queryset=StatusLog.objects.order_by('timestamp', 'id')))
+        .filter(pk=pk)
+        .first()
+    )
+    if build is None:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    # Missing one-to-one rows were cached as absent by select_related, so these don't query
+    checklist = getattr(build, 'checklist', None)
+    invoice_status = getattr(build, 'invoice_status', None)
+    return conditional_response(request, {
+        'build': BuildSerializer(build).data,
+        'statusLogs': StatusLogSerializer(build.status_logs.all(), many=True).data,
+        'checklist': ChecklistSerializer(checklist).data if checklist else None,
+        'invoiceStatus': InvoiceStatusSerializer(invoice_status).data if invoice_status else None,
+    })
+
+
+@api_view(['GET'])
+def build_report(request, pk):
+    # The QA report is rendered off the request path; until it is on disk the client is told to retry
+    from .reports import request_report
+
+    result = request_report(pk)
+    if result is None:
+        return Response({"error": "This build has no checklist yet"}, status=status.HTTP_404_NOT_FOUND)
+    path, digest, future = result
+    if future is None:
+        try:
+            response = ranged_file_response(request, path, quote_etag(digest), 'text/html; charset=utf-8')
+        except FileNotFoundError:
+            pass  # replaced by a newer render in the meantime
+        else:
+            response['Content-Disposition'] = f'inline; filename="build-{pk}-qa-report.html"'
+            return response
+    response = Response({"status": "rendering"}, status=status.HTTP_202_ACCEPTED)
+    response['Retry-After'] = '2'
+    return response
+
+
+@task('render_report')
+def render_build_report(payload):
+    from .reports import request_report
+
+    result = request_report(payload['build_id'])
+    if result is not None and result[2] is not None:
+        result[2].result()
+
+
+@api_view(['GET', 'POST'])
+def build_payments(request, pk):
+    try:
+        build = Build.objects.get(pk=pk)
+    except Build.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'GET':
+        payments = build.payments.order_by('paidOn', 'id')
+        return Response(PaymentSerializer(payments, many=True).data)
+
+    serializer = PaymentSerializer(data=request.data)
+    if serializer.is_valid():
+        payment = Payment.record(build, **serializer.validated_data)
+        enqueue('broadcast_build', {'build_id': build.id, 'topic': 'payments'})
+        return Response({
+            'payment': PaymentSerializer(payment).data,
+            'paymentDone': money(build.paymentDone),
+            'balancePayment': money(build.balancePayment),
+            'paymentStatus': build.paymentStatus,
+        }, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def money(value):
+    # Same string format as the DecimalFields in BuildSerializer
+    return f"{value or 0:.2f}"
+
+
+def conditional_response(request, data):
+    # Strong ETag over the payload; a matching If-None-Match gets an empty 304
+    payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder).encode('utf-8')
+    etag = quote_etag(hashlib.sha256(payload).hexdigest()[:32])
+    if etag_listed(etag, request.headers.get('If-None-Match', '')):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+    response['ETag'] = etag
+    return response
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def ranged_file_response(request, path, etag, content_type):
+    """
+    Serve a file with ETag revalidation and single byte-range requests
+    (Range / If-Range). Multi-range requests get the whole file.
+    """
+    if etag_listed(etag, request.headers.get('If-None-Match', '')):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+
+    size = path.stat().st_size
+    match = RANGE_RE.match(request.headers.get('Range', '').replace(' ', ''))
+    if_range = request.headers.get('If-Range')
+    if match and (if_range is None or if_range == etag) and match.group(1) + match.group(2):
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(size - int(last), 0), size - 1
+        if start >= size or start > end:
+            response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+            response['Content-Range'] = f"bytes */{size}"
+            return response
+        with open(path, 'rb') as stream:
+            stream.seek(start)
+            response = HttpResponse(stream.read(end - start + 1), status=status.HTTP_206_PARTIAL_CONTENT,
+                                    content_type=content_type)
+        response['Content-Range'] = f"bytes {start}-{end}/{size}"
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
+
+AGEING_BUCKETS = [('0-30', 0, 30), ('31-60', 31, 60), ('61-90', 61, 90), ('90+', 91, None)]
+
+@api_view(['GET'])
+def payments_receivables(request):
+    # Outstanding balance plus ageing by dateOfInitialPayment, all in one aggregate query
+    today = timezone.localdate()
+    aggregates = {
+        'outstanding': Sum('balancePayment'),
+        'builds': Count('id'),
+        'noPayment': Sum('balancePayment', filter=Q(dateOfInitialPayment__isnull=True)),
+    }
+    for label, min_age, max_age in AGEING_BUCKETS:
+        bucket = Q(dateOfInitialPayment__lte=today - timedelta(days=min_age))
+        if max_age is not None:
+            bucket &= Q(dateOfInitialPayment__gte=today - timedelta(days=max_age))
+        aggregates[label] = Sum('balancePayment', filter=bucket)
+    totals = Build.objects.filter(balancePayment__gt=0).aggregate(**aggregates)
+    return Response({
+        'outstanding': money(totals['outstanding']),
+        'builds': totals['builds'],
+        'ageing': {
+            label: money(totals[label])
+            for label in [label for label, _, _ in AGEING_BUCKETS] + ['noPayment']
+        },
+    })
+
+@api_view(['GET'])
+def payments_collections(request):
+    payments = Payment.objects.all()
+    try:
+        if request.query_params.get('from'):
+            payments = payments.filter(paidOn__gte=date.fromisoformat(request.query_params['from']))
+        if request.query_params.get('to'):
+            payments = payments.filter(paidOn__lte=date.fromisoformat(request.query_params['to']))
+    except ValueError:
+        return Response({"error": "'from' and 'to' must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+    daily = payments.values('paidOn').annotate(amount=Sum('amount'), payments=Count('id')).order_by('paidOn')
+    return Response([
+        {'date': row['paidOn'], 'amount': money(row['amount']), 'payments': row['payments']}
+        for row in daily
+    ])
+
+
+@api_view(['GET'])
+def stage_trends(request):
+    # Daily board counts for trend charts, one read over the (dimension, day, key) index
+    today = timezone.localdate()
+    try:
+        end = date.fromisoformat(request.query_params['to']) if request.query_params.get('to') else today
+        start = date.fromisoformat(request.query_params['from']) if request.query_params.get('from') else end - timedelta(days=365)
+    except ValueError:
+        return Response({"error": "'from' and 'to' must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+    dimensions = request.query_params.get('dimension')
+    dimensions = dimensions.split(',') if dimensions else StageSnapshot.DIMENSIONS
+    unknown = set(dimensions) - set(StageSnapshot.DIMENSIONS)
+    if unknown:
+        return Response({"error": f"Unknown dimensions: {', '.join(sorted(unknown))}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    days = {}
+    rows = (
+        StageSnapshot.objects
+        .filter(dimension__in=dimensions, day__range=(start, end))
+        .order_by('day')
+        .values_list('day', 'dimension', 'key', 'count')
+    )
+    for day, dimension, key, count in rows:
+        days.setdefault(day, {dimension: {} for dimension in dimensions})[dimension][key] = count
+
+    latest = StageSnapshot.objects.aggregate(latest=Max('day'))['latest']
+    if (latest is None or latest < today - timedelta(days=1)) \
+            and not Task.objects.filter(name='take_stage_snapshots', status=Task.PENDING).exists():
+        # Catch up in the background; the next read includes the missing days
+        enqueue('take_stage_snapshots')
+    return Response({
+        'from': start,
+        'to': end,
+        'snapshotsThrough': latest,
+        'days': [{'date': day, **counts} for day, counts in days.items()],
+    })
+
+
+@task('take_stage_snapshots')
+def take_stage_snapshots(payload):
+    from .trends import take_snapshots
+
+    take_snapshots()
+
+
 # Repeat for other models
 @api_view(['GET', 'POST'])
 def component_list_create(request):
@@ -239,18 +619,103 @@ def component_detail(request, pk):
         serializer = ComponentSerializer(component, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            enqueue('broadcast_build', {'build_id': component.build_id, 'topic': 'components'})
             return Response(serializer.data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     elif request.method == 'DELETE':
         component.delete()
+        enqueue('broadcast_build', {'build_id': component.build_id, 'topic': 'components'})
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+MAX_SERIAL_BATCH = 1000
+
+@api_view(['GET'])
+def component_by_serial(request, serial):
+    components = (
+        Component.objects
+        .select_related('build')
+        .filter(normalizedSerialNumber=normalize_serial(serial))
+    )
+    if not components:
+        return Response({"error": "No component with this serial number"}, status=status.HTTP_404_NOT_FOUND)
+    serializer = SerialLookupSerializer(components, many=True)
+    return Response(serializer.data)
+
+@api_view(['POST'])
+def component_by_serial_bulk(request):
+    serials = request.data.get('serials')
+    if not isinstance(serials, list) or not serials:
+        return Response({"error": "'serials' must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+    if len(serials) > MAX_SERIAL_BATCH:
+        return Response({"error": f"At most {MAX_SERIAL_BATCH} serials per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+    keys = {str(sn): normalize_serial(str(sn)) for sn in serials}
+    components = (
+        Component.objects
+        .select_related('build')
+        .filter(normalizedSerialNumber__in={key for key in keys.values() if key})
+    )
+    by_key = {}
+    for component in components:
+        by_key.setdefault(component.normalizedSerialNumber, []).append(component)
+
+    results = {}
+    missing = []
+    for serial, key in keys.items():
+        matches = by_key.get(key)
+        if matches:
+            results[serial] = SerialLookupSerializer(matches, many=True).data
+        else:
+            missing.append(serial)
+    return Response({"results": results, "missing": missing})
+
+@api_view(['GET'])
+def pending_components(request):
+    # Parts still missing a serial number on unshipped builds, grouped by name in one query
+    components = (
+        Component.objects
+        .filter(Q(serialNumber__isnull=True) | Q(serialNumber=''))
+        .exclude(build__currentStage='Shipped')
+    )
+    stages = request.query_params.getlist('stage')
+    if stages:
+        components = components.filter(build__currentStage__in=stages)
+    try:
+        deadline_from = request.query_params.get('deadline_from')
+        deadline_to = request.query_params.get('deadline_to')
+        if deadline_from:
+            components = components.filter(build__deadline__gte=date.fromisoformat(deadline_from))
+        if deadline_to:
+            components = components.filter(build__deadline__lte=date.fromisoformat(deadline_to))
+    except ValueError:
+        return Response({"error": "Deadlines must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+    rollup = (
+        components
+        .values('name')
+        .annotate(
+            quantity=Count('id'),
+            builds=Count('build', distinct=True),
+            earliestEta=Min('eta'),
+            earliestDeadline=Min('build__deadline'),
+        )
+        .order_by('earliestDeadline', 'name')
+    )
+    return Response(list(rollup))
+
+@poll_hints('status_logs')
 @api_view(['GET', 'POST'])
+@throttle_classes([StatusLogsThrottle])
 def status_log_list_create(request):
     if request.method == 'GET':
+        fields, error = parse_fields_param(request, StatusLog)
+        if error:
+            return error
         logs = StatusLog.objects.all()
-        serializer = StatusLogSerializer(logs, many=True)
+        if fields:
+            logs = logs.only(*fields)
+        serializer = StatusLogSerializer(logs, many=True, fields=fields)
         return Response(serializer.data)
     elif request.method == 'POST':
         serializer = StatusLogSerializer(data=request.data)
@@ -259,14 +724,24 @@ def status_log_list_create(request):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+@poll_hints('status_logs')
 @api_view(['GET'])
+@throttle_classes([StatusLogsThrottle])
 def get_status_log(request, build_id):
     if request.method == 'GET':
+        fields, error = parse_fields_param(request, StatusLog)
+        if error:
+            return error
         logs = StatusLog.objects.filter(build_id=build_id)
-        serializer = StatusLogSerializer(logs, many=True)
+        if fields:
+            logs = logs.only(*fields)
+        if include_archived(request):
+            logs = chain(logs, logs.using(ARCHIVE_DB))
+        serializer = StatusLogSerializer(logs, many=True, fields=fields)
         return Response(serializer.data)
 
 @api_view(['POST'])
+@idempotent('update_build_stage')
 def update_build_stage(request, build_id):
     try:
         build = Build.objects.get(pk=build_id)
@@ -284,9 +759,9 @@ def update_build_stage(request, build_id):
     if not stage or not user:
         return Response({"error": "Missing 'stage' or 'user'"}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Update build stage
+    # Update build stage, writing only that column so concurrent edits to other fields survive
     build.currentStage = stage
-    build.save()
+    build.save_changed(['currentStage'])
 
     # Create status log
     StatusLog.objects.create(
@@ -298,15 +773,24 @@ def update_build_stage(request, build_id):
         role=role,
         rollback_reason=rollback_reason
     )
+    enqueue('broadcast_build', {'build_id': build.id, 'topic': 'stages'})
 
     return Response({"message": "Build stage updated and status log created"}, status=status.HTTP_200_OK)
 
 
+@poll_hints('checklists')
 @api_view(['GET', 'POST'])
+@throttle_classes([ChecklistsThrottle])
+@idempotent('checklist_list_create')
 def checklist_list_create(request):
     if request.method == 'GET':
+        fields, error = parse_fields_param(request, Checklist)
+        if error:
+            return error
         checklists = Checklist.objects.all()
-        serializer = ChecklistSerializer(checklists, many=True)
+        if fields:
+            checklists = checklists.only(*fields)
+        serializer = ChecklistSerializer(checklists, many=True, fields=fields)
         return Response(serializer.data)
 
     elif request.method == 'POST':
@@ -329,22 +813,102 @@ def checklist_list_create(request):
             serializer = ChecklistSerializer(data=request.data)
 
         if serializer.is_valid():
-            serializer.save(build=build)  # Ensure the checklist is linked to the build
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            checklist = serializer.save(build=build)  # Ensure the checklist is linked to the build
+            enqueue('render_report', {'build_id': build.id})
+            enqueue('broadcast_build', {'build_id': build.id, 'topic': 'checklists'})
+            data = dict(serializer.data)
+            data['benchmarkReport'] = checklist.benchmark_report
+            return Response(data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@poll_hints('checklists')
 @api_view(['GET'])
+@throttle_classes([ChecklistsThrottle])
 def get_checklist(request, build_id):
-    checklist = get_object_or_404(Checklist, build__id=build_id)
+    checklist = Checklist.objects.filter(build__id=build_id).first()
+    if checklist is None and include_archived(request):
+        checklist = Checklist.objects.using(ARCHIVE_DB).filter(build__id=build_id).first()
+    if checklist is None:
+        raise Http404("No Checklist matches the given query.")
     serializer = ChecklistSerializer(checklist)
     return Response(serializer.data)
 
+@api_view(['GET'])
+def benchmark_distribution(request):
+    kind = request.query_params.get('kind')
+    if kind not in (None, 'cpu', 'gpu'):
+        return Response({"error": "'kind' must be 'cpu' or 'gpu'"}, status=status.HTTP_400_BAD_REQUEST)
+    component = request.query_params.get('component')
+
+    rows = BenchmarkResult.objects.values_list('checklist__build__components__name', *METRIC_FIELDS)
+    if component:
+        rows = rows.filter(checklist__build__components__name__icontains=component)
+
+    samples = {}
+    for name, *values in rows:
+        name_kind = component_kind(name or '')
+        if name_kind is None or (kind and name_kind != kind):
+            continue
+        metrics = samples.setdefault(name, {'kind': name_kind, 'values': {}})
+        for field, value in zip(METRIC_FIELDS, values):
+            if value is not None:
+                metrics['values'].setdefault(field, []).append(value)
+
+    result = {}
+    for name, metrics in samples.items():
+        wanted = CPU_METRICS if metrics['kind'] == 'cpu' else GPU_METRICS
+        result[name] = {
+            'kind': metrics['kind'],
+            'metrics': {
+                field: distribution(metrics['values'][field])
+                for field in wanted if field in metrics['values']
+            },
+        }
+    return Response(result)
+
+TRACKING_FIELDS = ['currentStage', 'eta', 'shipmentStatus', 'trackingNumber']
+TRACKING_CACHE_CONTROL = 'public, max-age=60, s-maxage=300, stale-while-revalidate=600'
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+@throttle_classes([TrackingThrottle])
+def track_order(request, enquiry_id, mobile_number):
+    # Public and identical for every caller, so a CDN or reverse proxy can absorb repeat hits
+    tracking = (
+        Build.objects
+        .filter(enquiryId=enquiry_id.strip(), mobileNumber=mobile_number.strip())
+        .order_by('-orderDate', '-id')
+        .values(*TRACKING_FIELDS)
+        .first()
+    )
+    if tracking is None:
+        response = Response({"error": "No order found for these details"}, status=status.HTTP_404_NOT_FOUND)
+        response['Cache-Control'] = 'public, max-age=60'
+        return response
+
+    if tracking['eta']:
+        tracking['eta'] = tracking['eta'].isoformat()
+    response = conditional_response(request, tracking)
+    response['Cache-Control'] = TRACKING_CACHE_CONTROL
+    return response
+
 @api_view(['GET', 'POST'])
 def invoice_status_list_create(request):
     if request.method == 'GET':
         invoices = InvoiceStatus.objects.all()
+        for flag in INVOICE_FLAGS:
+            value = request.query_params.get(flag)
+            if value is not None:
+                invoices = invoices.filter(**{flag: value.lower() in ('1', 'true', 'yes')})
+        build_ids = request.query_params.get('build')
+        if build_ids:
+            try:
+                invoices = invoices.filter(build_id__in=[int(build_id) for build_id in build_ids.split(',')])
+            except ValueError:
+                return Response({"error": "'build' must be a comma-separated list of ids"}, status=status.HTTP_400_BAD_REQUEST)
         serializer = InvoiceStatusSerializer(invoices, many=True)
         return Response(serializer.data)
     elif request.method == 'POST':
@@ -355,6 +919,80 @@ def invoice_status_list_create(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     
+INVOICE_FLAGS = ['invoice_raised', 'sales_order_raised']
+
+@api_view(['POST'])
+def invoice_status_bulk_upsert(request):
+    build_ids = request.data.get('build_ids')
+    if not isinstance(build_ids, list) or not build_ids:
+        return Response({"error": "'build_ids' must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+    flags = {flag: request.data[flag] for flag in INVOICE_FLAGS if flag in request.data}
+    if not flags or not all(isinstance(value, bool) for value in flags.values()):
+        return Response({"error": "Provide 'invoice_raised' and/or 'sales_order_raised' as booleans"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        build_ids = {int(build_id) for build_id in build_ids}
+    except (TypeError, ValueError):
+        return Response({"error": "'build_ids' must contain integer ids"}, status=status.HTTP_400_BAD_REQUEST)
+    existing_builds = set(Build.objects.filter(id__in=build_ids).values_list('id', flat=True))
+    missing = sorted(build_ids - existing_builds)
+    if missing:
+        return Response({"error": "Unknown builds", "build_ids": missing}, status=status.HTTP_400_BAD_REQUEST)
+
+    with transaction.atomic():
+        # Set-based upsert: insert rows that don't exist yet, then one UPDATE ... WHERE build_id IN (...)
+        InvoiceStatus.objects.bulk_create(
+            [InvoiceStatus(build_id=build_id, **flags) for build_id in existing_builds],
+            ignore_conflicts=True,
+        )
+        updated = InvoiceStatus.objects.filter(build_id__in=existing_builds).update(**flags)
+    bump_data_version()
+    return Response({"updated": updated, **flags})
+
+@api_view(['GET'])
+def export_table(request, table):
+    # Streams one table as Parquet or an Arrow IPC stream; ?since=<watermark> returns only rows changed after it
+    from .export import EXPORT_FORMATS, EXPORT_TABLES, TableExport, current_watermark, pyarrow_available, stream_export
+
+    if not pyarrow_available():
+        return Response({"error": "Columnar export needs pyarrow installed"}, status=status.HTTP_501_NOT_IMPLEMENTED)
+    if table not in EXPORT_TABLES:
+        return Response({"error": f"Unknown table, choose one of: {', '.join(EXPORT_TABLES)}"}, status=status.HTTP_404_NOT_FOUND)
+    fmt = request.query_params.get('output', 'parquet')
+    if fmt not in EXPORT_FORMATS:
+        return Response({"error": f"'output' must be one of: {', '.join(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+    since = None
+    if 'since' in request.query_params:
+        since = parse_datetime(request.query_params['since'])
+        if since is None or timezone.is_naive(since):
+            return Response({"error": "'since' must be an ISO timestamp with a UTC offset, as sent in X-Export-Watermark"}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Pin the upper bound first so the watermark header matches what the body contains
+    watermark = current_watermark()
+    export = TableExport(table, since, watermark)
+    extension, content_type = EXPORT_FORMATS[fmt]
+    response = StreamingHttpResponse(stream_export(export, fmt), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{table}.{extension}"'
+    response['X-Export-Watermark'] = watermark.isoformat()
+    return response
+
+@api_view(['GET'])
+def builds_without_invoice(request):
+    # LEFT JOIN over the build/invoice one-to-one: no row yet, or a row with invoice_raised unset
+    builds = (
+        Build.objects
+        .filter(Q(invoice_status__isnull=True) | Q(invoice_status__invoice_raised=False))
+        .order_by('orderDate', 'id')
+    )
+    stages = request.query_params.getlist('stage')
+    if stages:
+        builds = builds.filter(currentStage__in=stages)
+    rows = builds.values(
+        'id', 'customerName', 'enquiryId', 'currentStage', 'orderDate', 'totalAmount',
+        salesOrderRaised=Coalesce('invoice_status__sales_order_raised', False),
+    )
+    return Response([{**row, 'totalAmount': money(row['totalAmount'])} for row in rows])
+
 @api_view(['POST'])
 @permission_classes([AllowAny])  # No authentication required for login
 def login(request):
@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+# ASYNC_VIEWS=1 routes the hot read endpoints to app.async_views. Opt-in: the
+# async ORM still queues every query on one thread, and bench_concurrency shows
+# the async path slower than WSGI threads, so ASGI serves the sync views by default.
 
 application = get_asgi_application()
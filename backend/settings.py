@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import importlib.util
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -43,16 +45,42 @@ INSTALLED_APPS = [
     "corsheaders"
 ]
 
+# Lean startup for serverless API traffic: set LEAN_STARTUP=1 to skip the admin,
+# sessions, messages and static files apps (and their middleware) so a cold
+# lambda imports and initialises less before serving the first request.
+# vercel.json leaves it unset because the same deployment serves /admin/, which
+# needs those apps; set it on a deployment that only serves the API.
+LEAN_STARTUP = os.environ.get("LEAN_STARTUP") == "1"
+LEAN_EXCLUDED_APPS = [
+    "django.contrib.admin",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+]
+LEAN_EXCLUDED_MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+]
+# Route the hot read endpoints to app.async_views (ASGI only, opt-in; see backend/asgi.py)
+ASYNC_VIEWS = os.environ.get("ASYNC_VIEWS") == "1"
+
+if LEAN_STARTUP:
+    INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in LEAN_EXCLUDED_APPS]
+
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "app.middleware.CompressionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
+if LEAN_STARTUP:
+    MIDDLEWARE = [middleware for middleware in MIDDLEWARE if middleware not in LEAN_EXCLUDED_MIDDLEWARE]
 
 CORS_ALLOW_CREDENTIALS = True
 CORS_ORIGIN_WHITELIST = (
@@ -102,9 +130,17 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
-    }
+    },
+    # Cold storage for old shipped builds, see app/archive.py
+    "archive": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "archive.sqlite3",
+    },
 }
 
+# Shipped builds whose deadline is older than this many days are moved to the archive database
+ARCHIVE_AFTER_DAYS = 180
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -139,8 +175,74 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Per-endpoint polling limits (app/throttling.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'builds': '60/min',
+        'status_logs': '60/min',
+        'checklists': '60/min',
+        'tracking': '20/min',
+    },
+}
+if os.environ.get("DISABLE_THROTTLES") == "1":
+    # Load tests (bench_concurrency) measure the views, not the limiter; a None rate lets every request through
+    REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = dict.fromkeys(REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'])
+if LEAN_STARTUP:
+    # The browsable API pulls in the template engine on first render
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].remove('rest_framework.renderers.BrowsableAPIRenderer')
+if importlib.util.find_spec("msgpack"):
+    # Clients opt in with Accept: application/msgpack (or ?format=msgpack)
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('app.renderers.MessagePackRenderer')
+
+
+# Throttle counters and poll-interval state live in the local cache of each process
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "nuke-pc-build-tracker",
+    }
+}
+
+# X-Poll-Interval hint range in seconds; widens while the data is unchanged
+POLL_INTERVAL_MIN = 5
+POLL_INTERVAL_MAX = 60
+
+
+# Response compression (app/middleware.py); brotli is used when the package is installed
+COMPRESSION_MIN_SIZE = 1024  # bytes; smaller bodies are sent as-is
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+
+# Background task queue (app/tasks.py)
+TASK_WORKERS = 2
+TASK_BATCH_SIZE = 50
+TASK_POLL_INTERVAL = 5  # seconds an idle worker waits before re-checking the table
+TASK_LOCK_TIMEOUT = 300  # seconds before a task claimed by a dead worker is retried
+
+# Seconds a stored Idempotency-Key response is replayed before it is evicted (app/idempotency.py)
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_CLAIM_TIMEOUT = 60  # seconds before a retry may take over a key whose first request never finished
+
+# QA reports (app/reports.py): rendered in a process pool, cached on disk by content hash
+REPORT_CACHE_DIR = BASE_DIR / "report_cache"
+REPORT_WORKERS = 2
+
+# Estimated working days each stage takes until shipment, used by app/scheduler.py
+STAGE_ESTIMATE_DAYS = {
+    'Components Pending': 2,
+    'Components Assigned': 1,
+    'Build Started': 1,
+    'Build Completed': 1,
+    'Testing Started': 1,
+    'Test Completed': 1,
+    'Ready for Shipment': 1,
 }
 
+# Seconds before the in-memory assignment index (app/assignments.py) is rebuilt from the database
+ASSIGNMENT_INDEX_TTL = 300
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
@@ -10,9 +10,23 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
 application = get_wsgi_application()
 
+
+
+def compile_urlpatterns(patterns):
+    # Import the views and compile every route regex while the lambda is
+    # initialising, so the first request does not pay for it
+    for pattern in patterns:
+        pattern.pattern.regex
+        if hasattr(pattern, "url_patterns"):
+            compile_urlpatterns(pattern.url_patterns)
+
+
+compile_urlpatterns(get_resolver().url_patterns)
+
 app = application
\ No newline at end of file